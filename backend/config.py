@@ -17,6 +17,12 @@ class Settings(BaseSettings):
     watsonx_api_key: Optional[str] = None
     watsonx_project_id: Optional[str] = None
     watsonx_url: str = "https://us-south.ml.cloud.ibm.com"
+    watsonx_concurrency: int = 10  # Max concurrent async generation requests
+    request_timeout_s: float = 15.0  # Per-attempt generation timeout
+    max_retries: int = 2  # Retries after a timed-out generation request
+    watsonx_batch_window_ms: float = 0.0  # Coalesce async requests arriving within this window (0 = off)
+    watsonx_batch_size: int = 16  # Max prompts per coalesced request
+    watsonx_http_client: bool = False  # Call the REST API over a pooled httpx client instead of the SDK
     
     # CORS
     frontend_url: str = "http://localhost:3000"
@@ -27,6 +33,14 @@ class Settings(BaseSettings):
     
     # Token budget
     token_budget_usd: float = 250.0
+    accurate_token_count: bool = False  # Count billed tokens with the tokenizer instead of estimating
+    
+    # Response cache
+    enable_response_cache: bool = True
+    # Reuse explanations and compliance analyses across similar transactions (ignores customer name, buckets amount/score)
+    enable_similar_response_cache: bool = False
+    response_cache_ttl_seconds: float = 3600.0
+    response_cache_max_entries: int = 1024
     
     class Config:
         env_file = ".env"
@@ -5,12 +5,14 @@ IBM SkillsBuild AI Experiential Learning Lab 2025
 FastAPI backend with watsonx.ai integration.
 """
 
+import logging
 from datetime import datetime, timedelta
 from typing import List
 from uuid import uuid4
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import get_settings
@@ -34,8 +36,8 @@ from schemas import (
     ComplianceAnalysisRequest,
     ComplianceAnalysisResponse,
 )
-from services.watsonx_service import WatsonXService
-from services.document_service import document_service
+from services.watsonx_service import get_watsonx_service
+from services.document_service import DocumentService, get_document_service
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -49,14 +51,24 @@ app = FastAPI(
 # Load settings
 settings = get_settings()
 
+# Log our own services only; third-party loggers (httpx, SDK) keep their defaults
+_services_logger = logging.getLogger("services")
+if not _services_logger.handlers:  # main can be imported more than once (reload, tests)
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    _services_logger.addHandler(_log_handler)
+_services_logger.setLevel(settings.log_level.upper())
+_services_logger.propagate = False
+
 # Initialize watsonx.ai service
-watsonx_service = WatsonXService()
+watsonx_service = get_watsonx_service()
 
 # Startup event: Load sample compliance documents
 @app.on_event("startup")
 async def startup_event():
     """Load sample compliance documents on startup."""
     compliance_docs_dir = Path(__file__).parent / "compliance_documents"
+    document_service = get_document_service()
     
     if compliance_docs_dir.exists():
         print("📄 Loading sample compliance documents...")
@@ -224,6 +236,28 @@ CASES_DB = {
     },
 }
 
+
+def _build_rag_query(case: dict) -> str:
+    """Build the compliance document retrieval query for a case."""
+    return f"transaction {case['amount']} {case['country']} risk assessment compliance"
+
+
+# Precompute retrieval terms once per case so /analyze-compliance only does a lookup
+for _case in CASES_DB.values():
+    _case["rag_query_terms"] = DocumentService.build_query_terms(_build_rag_query(_case))
+
+# Country risk weights for rule-based scoring (unlisted countries default to low)
+SCORING_COUNTRY_RISK = {"SG": 0.7, "CN": 0.7, "RU": 0.7, "IR": 0.7}
+DEFAULT_COUNTRY_RISK = 0.3
+
+# High-risk jurisdictions for rule-based compliance screening
+# (includes CH (Switzerland) for banking secrecy)
+COMPLIANCE_HIGH_RISK_COUNTRIES = frozenset({"IR", "KP", "SY", "RU", "CN", "CH"})
+
+# Supported upload extensions mapped to document file type
+UPLOAD_FILE_TYPES = {".pdf": "PDF", ".docx": "DOCX", ".md": "MD", ".txt": "TXT"}
+UPLOAD_ALLOWED_MESSAGE = f"Allowed: {', '.join(UPLOAD_FILE_TYPES)}"
+
 # Store explanations separately (keyed by case_id)
 EXPLANATIONS_DB = {}
 
@@ -372,7 +406,7 @@ async def explain_case(request: ExplanationRequest):
     if watsonx_service.is_available():
         try:
             # Generate explanation using watsonx.ai
-            result = watsonx_service.generate_explanation(
+            result = await watsonx_service.generate_explanation_async(
                 customer_name=case["customer_name"],
                 amount=case["amount"],
                 country=case["country"],
@@ -484,6 +518,68 @@ async def explain_case(request: ExplanationRequest):
     return explanation
 
 
+@app.post(
+    "/explain/stream",
+    tags=["AI"],
+    summary="Stream AI explanation",
+    description="Stream a watsonx.ai risk assessment explanation as plain text while it is generated.",
+    responses={
+        404: {"model": ErrorResponse, "description": "Case not found"},
+        503: {"model": ErrorResponse, "description": "AI service unavailable"},
+        429: {"model": ErrorResponse, "description": "Token budget exceeded"},
+    },
+)
+async def explain_case_stream(request: ExplanationRequest):
+    """
+    Stream an AI explanation for a case using watsonx.ai.
+    
+    Unlike /explain, there is no mock fallback and the result is not stored.
+    
+    Args:
+        request: Explanation request with case_id.
+        
+    Returns:
+        Plain-text stream of the raw model output.
+        
+    Raises:
+        HTTPException: 404 if case not found, 503 if AI unavailable, 429 if budget exceeded.
+    """
+    case = CASES_DB.get(request.case_id)
+    if case is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Case with ID {request.case_id} not found",
+        )
+    
+    if not watsonx_service.is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="watsonx.ai service is not available",
+        )
+    
+    try:
+        stream = watsonx_service.generate_explanation_stream(
+            customer_name=case["customer_name"],
+            amount=case["amount"],
+            country=case["country"],
+            risk_score=case["risk_score"],
+            account_age_days=case.get("account_age_days"),
+            transaction_count_30d=case.get("transaction_count_30d"),
+        )
+    except Exception as e:
+        if "budget exceeded" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Token budget exceeded. Cannot generate more explanations.",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI generation failed: {e}",
+        )
+    
+    return StreamingResponse(stream, media_type="text/plain")
+
+
 @app.get(
     "/cases/{case_id}/explanation",
     response_model=ExplanationResponse,
@@ -576,7 +672,7 @@ async def calculate_risk_category(case_id: str):
     if watsonx_service.is_available():
         try:
             # Generate risk category using watsonx.ai
-            result = watsonx_service.generate_risk_category(
+            result = await watsonx_service.generate_risk_category_async(
                 customer_name=case["customer_name"],
                 amount=case["amount"],
                 country=case["country"],
@@ -668,7 +764,7 @@ async def calculate_risk_score(request: RiskScoreRequest):
     if watsonx_service.is_available():
         try:
             # Generate risk score using watsonx.ai
-            result = watsonx_service.generate_risk_score(
+            result = await watsonx_service.generate_risk_score_async(
                 customer_name=case["customer_name"],
                 amount=case["amount"],
                 country=case["country"],
@@ -715,8 +811,7 @@ async def calculate_risk_score(request: RiskScoreRequest):
     amount_risk = min(1.0, case["amount"] / 20000)  # $20k+ = high risk
     
     # Simple country risk mapping
-    high_risk_countries = {"SG", "CN", "RU", "IR"}
-    country_risk = 0.7 if case["country"] in high_risk_countries else 0.3
+    country_risk = SCORING_COUNTRY_RISK.get(case["country"], DEFAULT_COUNTRY_RISK)
     
     # Weighted average
     calculated_score = (amount_risk * 0.6) + (country_risk * 0.4)
@@ -809,7 +904,7 @@ async def generate_report(request: ReportRequest = ReportRequest()):
     if request.include_ai_summary and watsonx_service.is_available():
         try:
             # Phase 2: Use watsonx.ai for summary
-            result = watsonx_service.generate_report_summary(
+            result = await watsonx_service.generate_report_summary_async(
                 total_cases=total_cases,
                 high_risk_count=high_risk,
                 medium_risk_count=medium_risk,
@@ -918,13 +1013,13 @@ async def upload_document(file: UploadFile = File(...)):
         HTTPException: 400 if file type not supported, 500 if processing fails
     """
     # Validate file type
-    allowed_extensions = {".pdf", ".docx", ".md", ".txt"}
     file_ext = Path(file.filename).suffix.lower() if file.filename else ""
+    file_type = UPLOAD_FILE_TYPES.get(file_ext)
     
-    if file_ext not in allowed_extensions:
+    if file_type is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type {file_ext} not supported. Allowed: {', '.join(allowed_extensions)}",
+            detail=f"File type {file_ext} not supported. {UPLOAD_ALLOWED_MESSAGE}",
         )
     
     # Save file temporarily
@@ -939,10 +1034,10 @@ async def upload_document(file: UploadFile = File(...)):
         file_path.write_bytes(content)
         
         # Process with Docling
-        result = document_service.process_document(
+        result = await get_document_service().process_document_async(
             file_path=str(file_path),
             filename=file.filename or "unknown",
-            file_type=file_ext[1:].upper(),  # Remove leading dot
+            file_type=file_type,
             size_bytes=len(content),
         )
         
@@ -979,7 +1074,7 @@ async def list_documents():
     Returns:
         List of document metadata including processing status
     """
-    documents = document_service.list_documents()
+    documents = get_document_service().list_documents()
     
     doc_metadata = [
         DocumentMetadata(
@@ -1022,7 +1117,7 @@ async def delete_document(document_id: str):
     Raises:
         HTTPException: 404 if document not found
     """
-    success = document_service.delete_document(document_id)
+    success = get_document_service().delete_document(document_id)
     
     if not success:
         raise HTTPException(
@@ -1067,43 +1162,48 @@ async def analyze_compliance(request: ComplianceAnalysisRequest):
     Raises:
         HTTPException: 404 if case not found, 503 if AI unavailable, 429 if budget exceeded
     """
+    # Bind module-level services locally (referenced many times below)
+    docsvc = get_document_service()
+    wx = watsonx_service
+    
     # Check if case exists
-    if request.case_id not in CASES_DB:
+    case = CASES_DB.get(request.case_id)
+    if case is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Case with ID {request.case_id} not found",
         )
     
-    case = CASES_DB[request.case_id]
-    
     # Get relevant document context (RAG)
     document_context = ""
     documents_used = []
     
     if request.use_documents:
-        # Retrieve relevant chunks based on transaction data
-        query = f"transaction {case['amount']} {case['country']} risk assessment compliance"
-        relevant_chunks = document_service.retrieve_relevant_chunks(query, top_k=5)
+        # Retrieve relevant chunks based on transaction data (terms precomputed per case)
+        query_terms = case.get("rag_query_terms") or docsvc.build_query_terms(
+            _build_rag_query(case)
+        )
+        relevant_chunks = docsvc.retrieve_by_terms(query_terms, top_k=5)
         
         if relevant_chunks:
             document_context = "\n\n".join([chunk.text for chunk in relevant_chunks])
             # Get unique document filenames
             doc_ids = list(set([chunk.document_id for chunk in relevant_chunks]))
             for doc_id in doc_ids:
-                doc = document_service.get_document_metadata(doc_id)
+                doc = docsvc.get_document_metadata(doc_id)
                 if doc:
                     documents_used.append(doc["filename"])
         else:
             # Fallback: use all documents if no specific chunks retrieved
-            document_context = document_service.get_all_chunks_text()
-            all_docs = document_service.list_documents()
+            document_context = docsvc.get_all_chunks_text()
+            all_docs = docsvc.list_documents()
             documents_used = [doc["filename"] for doc in all_docs]
     
     # Try to use real watsonx.ai with RAG
-    if watsonx_service.is_available() and document_context:
+    if wx.is_available() and document_context:
         try:
             # Generate compliance analysis using watsonx.ai + RAG
-            result = watsonx_service.analyze_compliance_with_rag(
+            result = await wx.analyze_compliance_with_rag_async(
                 customer_name=case["customer_name"],
                 amount=case["amount"],
                 country=case["country"],
@@ -1121,14 +1221,14 @@ async def analyze_compliance(request: ComplianceAnalysisRequest):
                 recommendation=result["recommendation"],
                 confidence=result["confidence"],
                 documents_used=documents_used,
-                model_used=watsonx_service.MODEL_ID,
+                model_used=wx.MODEL_ID,
                 tokens_consumed=result["tokens_consumed"],
                 generation_time_ms=result["generation_time_ms"],
                 created_at=datetime.now(),
             )
             
             # Check if budget is getting low
-            token_status = watsonx_service.get_token_usage()
+            token_status = wx.get_token_usage()
             if token_status["percentage_used"] >= 90:
                 print(f"⚠️  WARNING: {token_status['percentage_used']:.1f}% of token budget used!")
             
@@ -1184,8 +1284,7 @@ async def analyze_compliance(request: ComplianceAnalysisRequest):
         relevant_regulations.append("AML Policy - Transaction Monitoring Requirements")
     
     # Check high-risk country
-    high_risk_countries = {"IR", "KP", "SY", "RU", "CN", "CH"}  # Added CH (Switzerland) for banking secrecy
-    if case["country"] in high_risk_countries:
+    if case["country"] in COMPLIANCE_HIGH_RISK_COUNTRIES:
         violations.append(f"Transaction involves high-risk jurisdiction: {case['country']}")
         relevant_regulations.append("Sanctions Compliance Policy - High-Risk Country Screening")
     
@@ -3,13 +3,18 @@ Service layer for Risk Assessment AI
 
 This package contains business logic and external service integrations:
 - watsonx_service: IBM watsonx.ai API integration
+- watsonx_http: Direct watsonx.ai REST client (optional, pooled connections)
 - prompt_builder: AI prompt construction
 - token_tracker: Token usage monitoring
+- response_cache: LLM response caching
+- batch_dispatcher: Micro-batching of concurrent generation requests
 """
 
 from .watsonx_service import WatsonXService
 from .prompt_builder import PromptBuilder
 from .token_tracker import TokenTracker
+from .response_cache import ResponseCache
+from .batch_dispatcher import BatchDispatcher
 
-__all__ = ["WatsonXService", "PromptBuilder", "TokenTracker"]
+__all__ = ["WatsonXService", "PromptBuilder", "TokenTracker", "ResponseCache", "BatchDispatcher"]
 
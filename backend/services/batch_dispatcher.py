@@ -0,0 +1,106 @@
+"""
+Batch Dispatcher
+
+Coalesces concurrent generation requests into batched model calls.
+Prompts arriving within a short window (or until the batch is full) are sent
+together as one request, and each caller receives its own response.
+"""
+
+from typing import Callable, List, Optional, Set, Tuple
+import asyncio
+
+
+class BatchDispatcher:
+    """Micro-batcher for async generation requests"""
+
+    def __init__(
+        self,
+        generate_batch: Callable[[List[str]], List[str]],
+        max_batch_size: int = 16,
+        max_wait_s: float = 0.02,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        on_abandoned: Optional[Callable[[str, str], None]] = None,
+    ):
+        """
+        Initialize batch dispatcher
+
+        Args:
+            generate_batch: Blocking function mapping a list of prompts to their
+                responses, in order (run in a worker thread)
+            max_batch_size: Prompts per batch; a full batch is sent immediately
+            max_wait_s: Longest a prompt waits for others to join its batch
+            semaphore: Optional limit on batched calls in flight (shared with other callers)
+            on_abandoned: Optional callback on_abandoned(prompt, response) for responses
+                whose caller stopped waiting (timed out or cancelled) after dispatch
+        """
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._semaphore = semaphore
+        self.on_abandoned = on_abandoned
+        # The event loop only keeps weak references to tasks; hold running batches here
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, prompt: str) -> str:
+        """
+        Queue a prompt for the next batch and wait for its response
+
+        Args:
+            prompt: Fully built prompt
+
+        Returns:
+            Model response for this prompt
+
+        Raises:
+            Exception: Whatever the batched model call raised
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_s, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send everything pending as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        # Callers that timed out or were cancelled while queued are not sent
+        batch = [(prompt, future) for prompt, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run one batched model call and resolve each caller's future"""
+        try:
+            if self._semaphore is None:
+                responses = await self._generate(batch)
+            else:
+                async with self._semaphore:
+                    responses = await self._generate(batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():  # Caller may have timed out and cancelled
+                    future.set_exception(e)
+            return
+
+        for (prompt, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+            elif self.on_abandoned is not None:
+                self.on_abandoned(prompt, response)
+
+    async def _generate(self, batch: List[Tuple[str, asyncio.Future]]) -> List[str]:
+        """Run the blocking batch call in a worker thread"""
+        return await asyncio.to_thread(self.generate_batch, [prompt for prompt, _ in batch])
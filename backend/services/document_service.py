@@ -3,10 +3,21 @@ Document processing service using IBM Docling.
 Handles document upload, text extraction, chunking, and RAG retrieval.
 """
 
+import asyncio
+import heapq
+import math
+import multiprocessing
+import os
+import re
 import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 try:
@@ -16,10 +27,127 @@ except ImportError:
     DOCLING_AVAILABLE = False
     print("⚠️  Docling not installed. Document processing will use mock mode.")
 
+# Retrieval tokens: lowercase alphanumeric runs
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# zlib level for stored chunk text (retrieval never decompresses; only RAG context building does)
+CHUNK_TEXT_COMPRESSION_LEVEL = 6
+
+# Target chunk size in words for Docling extraction
+DOCLING_CHUNK_SIZE = 500
+
+# Process pool for CPU-bound Docling conversion (created on first use)
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+
+# Per-worker-process Docling converter (created on first conversion)
+_worker_converter = None
+
+
+# Mock compliance content used when Docling is unavailable
+_MOCK_CONTENT = {
+    "AML Policy": [
+        "Anti-Money Laundering (AML) Policy: All financial institutions must implement robust AML controls. Transactions exceeding $10,000 USD require enhanced due diligence (EDD). High-risk jurisdictions include countries with weak regulatory frameworks or known for financial crime.",
+        "Customer Due Diligence (CDD): Financial institutions must verify customer identity, understand the nature of their business, and assess the purpose of transactions. Enhanced due diligence is required for politically exposed persons (PEPs) and high-risk countries.",
+        "Suspicious Activity Reporting (SAR): Any transaction that appears unusual or lacks clear economic rationale must be reported to the Financial Intelligence Unit (FIU) within 24 hours. Patterns indicating potential money laundering include structuring, rapid movement of funds, and transactions with sanctioned entities.",
+    ],
+    "KYC Guidelines": [
+        "Know Your Customer (KYC) Requirements: Before establishing a business relationship, institutions must collect and verify: full legal name, date of birth, residential address, government-issued identification, and source of funds. For corporate clients, beneficial ownership must be identified.",
+        "Risk-Based Approach: Customer risk ratings should be assigned based on: country of residence, transaction volume, nature of business, and expected account activity. High-risk customers require more frequent monitoring and periodic review.",
+        "Ongoing Monitoring: All customer relationships must be subject to continuous monitoring. Unusual patterns, significant deviations from expected behavior, or changes in risk profile trigger immediate review and potential escalation.",
+    ],
+    "Sanctions Compliance": [
+        "Sanctions Screening: All transactions must be screened against OFAC, UN, EU, and local sanctions lists before processing. Real-time screening is required for wire transfers and cross-border payments.",
+        "Country Risk Assessment: Transactions involving high-risk jurisdictions (e.g., Iran, North Korea, Syria) are prohibited. Transactions with medium-risk countries require additional compliance checks and senior management approval.",
+        "Embargo Enforcement: Financial institutions must block and report any transactions involving sanctioned individuals, entities, or countries. Penalties for violations include fines up to $1 million and criminal prosecution.",
+    ],
+}
+
+# Filename fragment (e.g. "aml_policy") -> mock document type
+_MOCK_KEYS = {key.lower().replace(" ", "_"): key for key in _MOCK_CONTENT}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Get the shared Docling process pool."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        # spawn: forking a multi-threaded server can copy a held lock into the child
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _EXECUTOR
+
+
+def _reset_executor(broken: ProcessPoolExecutor):
+    """Discard a pool whose worker died so the next conversion starts a fresh one."""
+    global _EXECUTOR
+    if _EXECUTOR is broken:
+        _EXECUTOR = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _chunk_pages(
+    page_texts: Iterable[str],
+    chunk_size: int,
+) -> List[Tuple[str, Optional[int]]]:
+    """
+    Split page texts into fixed-size word chunks.
+    
+    Args:
+        page_texts: Text of each page, in order
+        chunk_size: Target chunk size in words
+        
+    Returns:
+        List of (chunk_text, page_number) tuples; the final partial chunk has no page number
+    """
+    records = []
+    
+    # Words carried over between pages until a full chunk is available
+    buffer: List[str] = []
+    
+    for page_num, page_text in enumerate(page_texts, start=1):
+        buffer.extend(page_text.split())
+        
+        # Flush every full chunk with a single slice + join
+        start = 0
+        while len(buffer) - start >= chunk_size:
+            records.append((" ".join(buffer[start:start + chunk_size]), page_num))
+            start += chunk_size
+        
+        del buffer[:start]
+    
+    # Add remaining text as final chunk
+    if buffer:
+        records.append((" ".join(buffer), None))
+    
+    return records
+
+
+def _docling_worker(file_path: str, chunk_size: int) -> List[Tuple[str, Optional[int]]]:
+    """
+    Convert a document with Docling and chunk its text (runs in a worker process).
+    
+    Args:
+        file_path: Path to document
+        chunk_size: Target chunk size in words
+        
+    Returns:
+        Serializable list of (chunk_text, page_number) tuples
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = DocumentConverter()
+    
+    doc = _worker_converter.convert(file_path).document
+    return _chunk_pages((page.export_to_markdown() for page in doc.pages), chunk_size)
+
 
 class DocumentChunk:
     """Represents a chunk of text extracted from a document."""
     
+    # No per-instance __dict__: the service may hold a very large number of chunks
+    __slots__ = ("chunk_id", "document_id", "text_z", "page_number", "metadata", "created_at", "tokens")
+    
     def __init__(
         self,
         chunk_id: str,
@@ -30,10 +158,16 @@ class DocumentChunk:
     ):
         self.chunk_id = chunk_id
         self.document_id = document_id
-        self.text = text
+        self.text_z = zlib.compress(text.encode("utf-8"), CHUNK_TEXT_COMPRESSION_LEVEL)
         self.page_number = page_number
         self.metadata = metadata or {}
         self.created_at = datetime.now()
+        self.tokens: frozenset = frozenset()  # Unique retrieval tokens, set when indexed
+    
+    @property
+    def text(self) -> str:
+        """Chunk text (stored zlib-compressed)."""
+        return zlib.decompress(self.text_z).decode("utf-8")
 
 
 class DocumentService:
@@ -49,21 +183,22 @@ class DocumentService:
         self.chunks: Dict[str, DocumentChunk] = {}  # chunk_id -> chunk
         self.document_chunks: Dict[str, List[str]] = {}  # document_id -> [chunk_ids]
         
-        # Initialize Docling converter if available
-        if DOCLING_AVAILABLE:
-            try:
-                # Initialize DocumentConverter (simpler approach without pipeline_options)
-                self.converter = DocumentConverter()
-                print("✓ Docling initialized successfully")
-            except Exception as e:
-                print(f"⚠️  Docling initialization failed: {e}")
-                self.converter = None
-        else:
-            self.converter = None
+        # TF-IDF inverted index for retrieval
+        self._postings: Dict[str, Dict[str, int]] = {}  # token -> {chunk_id: term frequency}
+        self._idf: Dict[str, float] = {}  # token -> inverse document frequency
+        self._chunk_norms: Dict[str, float] = {}  # chunk_id -> TF-IDF vector norm
+        self._index_dirty = False  # idf/norms need rebuilding after mutation
+        
+        # Shared chunk text: identical passages across documents reference one buffer
+        self._text_pool: Dict[bytes, List[Any]] = {}  # compressed text -> [canonical bytes, ref count]
+        
+        # Cached RAG context text, rebuilt only after documents change
+        self._doc_text_cache: Dict[str, str] = {}  # document_id -> rendered document block
+        self._all_text_cache: Optional[str] = None
     
     def is_available(self) -> bool:
-        """Check if Docling is available and initialized."""
-        return DOCLING_AVAILABLE and self.converter is not None
+        """Check if Docling is installed (converters are created per worker process on first use)."""
+        return DOCLING_AVAILABLE
     
     def process_document(
         self,
@@ -84,10 +219,78 @@ class DocumentService:
         Returns:
             Dictionary with document metadata and processing results
         """
+        document_id = self._register_document(file_path, filename, file_type, size_bytes)
+        
+        records = None
+        if self._uses_docling(file_type):
+            executor = _get_executor()
+            try:
+                records = executor.submit(
+                    _docling_worker, file_path, DOCLING_CHUNK_SIZE
+                ).result()
+            except BrokenProcessPool as e:
+                print(f"✗ Docling worker crashed: {e}")
+                _reset_executor(executor)
+            except Exception as e:
+                print(f"✗ Docling processing failed: {e}")
+                # Fall through to mock mode on error
+        
+        return self._store_chunks(document_id, filename, records)
+    
+    async def process_document_async(
+        self,
+        file_path: str,
+        filename: str,
+        file_type: str,
+        size_bytes: int,
+    ) -> Dict[str, Any]:
+        """
+        Process a document without blocking the event loop.
+        Docling conversion runs in the process pool so concurrent uploads use all cores.
+        
+        Args:
+            file_path: Path to the document file
+            filename: Original filename
+            file_type: File type (PDF, DOCX, etc.)
+            size_bytes: File size in bytes
+            
+        Returns:
+            Dictionary with document metadata and processing results
+        """
+        document_id = self._register_document(file_path, filename, file_type, size_bytes)
+        
+        records = None
+        if self._uses_docling(file_type):
+            executor = _get_executor()
+            try:
+                loop = asyncio.get_running_loop()
+                records = await loop.run_in_executor(
+                    executor, _docling_worker, file_path, DOCLING_CHUNK_SIZE
+                )
+            except BrokenProcessPool as e:
+                print(f"✗ Docling worker crashed: {e}")
+                _reset_executor(executor)
+            except Exception as e:
+                print(f"✗ Docling processing failed: {e}")
+                # Fall through to mock mode on error
+        
+        return self._store_chunks(document_id, filename, records)
+    
+    def _uses_docling(self, file_type: str) -> bool:
+        """Check if a file type is processed with Docling (markdown/text are not)."""
+        return file_type not in ["MD", "TXT"] and self.is_available()
+    
+    def _register_document(
+        self,
+        file_path: str,
+        filename: str,
+        file_type: str,
+        size_bytes: int,
+    ) -> str:
+        """Store metadata for a new document and return its ID."""
         document_id = str(uuid4())
         
-        # Store document metadata
-        doc_metadata = {
+        self.documents[document_id] = {
             "id": document_id,
             "filename": filename,
             "file_type": file_type,
@@ -98,30 +301,38 @@ class DocumentService:
             "file_path": file_path,
         }
         
-        self.documents[document_id] = doc_metadata
+        return document_id
+    
+    def _store_chunks(
+        self,
+        document_id: str,
+        filename: str,
+        records: Optional[List[Tuple[str, Optional[int]]]],
+    ) -> Dict[str, Any]:
+        """
+        Index extracted chunks for a registered document.
+        
+        Args:
+            document_id: Document UUID
+            filename: Original filename
+            records: (chunk_text, page_number) tuples from Docling, or None to use mock chunks
+            
+        Returns:
+            Dictionary with processing results
+        """
+        doc_metadata = self.documents[document_id]
+        
+        if records is not None:
+            chunks = self._store_docling_chunks(document_id, records)
+            doc_metadata["processing_status"] = "processed"
+        else:
+            # Use mock chunks for MD/TXT files or when Docling unavailable
+            chunks = self._create_mock_chunks(document_id, filename)
+            doc_metadata["processing_status"] = "mock" if self.is_available() else "no-docling"
         
-        # Process with Docling if available and file is not markdown
-        if self.is_available() and file_type not in ["MD", "TXT"]:
-            try:
-                chunks = self._extract_chunks_with_docling(document_id, file_path)
-                doc_metadata["processed"] = True
-                doc_metadata["chunk_count"] = len(chunks)
-                doc_metadata["processing_status"] = "processed"
-                
-                return {
-                    "document_id": document_id,
-                    "chunks_extracted": len(chunks),
-                    "status": "processed",
-                }
-            except Exception as e:
-                print(f"✗ Docling processing failed: {e}")
-                # Fall through to mock mode on error
-                
-        # Use mock chunks for MD/TXT files or when Docling unavailable
-        chunks = self._create_mock_chunks(document_id, filename)
         doc_metadata["processed"] = True
         doc_metadata["chunk_count"] = len(chunks)
-        doc_metadata["processing_status"] = "mock" if self.is_available() else "no-docling"
+        self._all_text_cache = None
         
         return {
             "document_id": document_id,
@@ -129,80 +340,33 @@ class DocumentService:
             "status": "processed",
         }
     
-    def _extract_chunks_with_docling(
+    def _store_docling_chunks(
         self,
         document_id: str,
-        file_path: str,
-        chunk_size: int = 500,
+        records: List[Tuple[str, Optional[int]]],
     ) -> List[DocumentChunk]:
         """
-        Extract text chunks from document using Docling.
+        Build and index DocumentChunk objects from Docling worker output.
         
         Args:
             document_id: Document UUID
-            file_path: Path to document
-            chunk_size: Target chunk size in words
+            records: (chunk_text, page_number) tuples
             
         Returns:
             List of DocumentChunk objects
         """
         chunks = []
         
-        # Convert document
-        result = self.converter.convert(file_path)
-        
-        # Extract text and metadata
-        doc = result.document
-        
-        # Process each page
-        current_chunk = []
-        current_word_count = 0
-        
-        for page_num, page in enumerate(doc.pages, start=1):
-            # Get text from page
-            page_text = page.export_to_markdown()
-            
-            # Split into words
-            words = page_text.split()
-            
-            for word in words:
-                current_chunk.append(word)
-                current_word_count += 1
-                
-                # Create chunk when size reached
-                if current_word_count >= chunk_size:
-                    chunk_text = " ".join(current_chunk)
-                    chunk_id = str(uuid4())
-                    
-                    chunk = DocumentChunk(
-                        chunk_id=chunk_id,
-                        document_id=document_id,
-                        text=chunk_text,
-                        page_number=page_num,
-                        metadata={"extraction_method": "docling"},
-                    )
-                    
-                    chunks.append(chunk)
-                    self.chunks[chunk_id] = chunk
-                    
-                    # Reset for next chunk
-                    current_chunk = []
-                    current_word_count = 0
-        
-        # Add remaining text as final chunk
-        if current_chunk:
-            chunk_text = " ".join(current_chunk)
-            chunk_id = str(uuid4())
-            
+        for text, page_number in records:
             chunk = DocumentChunk(
-                chunk_id=chunk_id,
+                chunk_id=uuid4().hex,  # Internal ID; skip dashed formatting
                 document_id=document_id,
-                text=chunk_text,
+                text=text,
+                page_number=page_number,
                 metadata={"extraction_method": "docling"},
             )
-            
             chunks.append(chunk)
-            self.chunks[chunk_id] = chunk
+            self._add_chunk(chunk)
         
         # Store document-chunk mapping
         self.document_chunks[document_id] = [c.chunk_id for c in chunks]
@@ -213,36 +377,18 @@ class DocumentService:
     
     def _create_mock_chunks(self, document_id: str, filename: str) -> List[DocumentChunk]:
         """Create mock compliance document chunks for testing."""
-        mock_content = {
-            "AML Policy": [
-                "Anti-Money Laundering (AML) Policy: All financial institutions must implement robust AML controls. Transactions exceeding $10,000 USD require enhanced due diligence (EDD). High-risk jurisdictions include countries with weak regulatory frameworks or known for financial crime.",
-                "Customer Due Diligence (CDD): Financial institutions must verify customer identity, understand the nature of their business, and assess the purpose of transactions. Enhanced due diligence is required for politically exposed persons (PEPs) and high-risk countries.",
-                "Suspicious Activity Reporting (SAR): Any transaction that appears unusual or lacks clear economic rationale must be reported to the Financial Intelligence Unit (FIU) within 24 hours. Patterns indicating potential money laundering include structuring, rapid movement of funds, and transactions with sanctioned entities.",
-            ],
-            "KYC Guidelines": [
-                "Know Your Customer (KYC) Requirements: Before establishing a business relationship, institutions must collect and verify: full legal name, date of birth, residential address, government-issued identification, and source of funds. For corporate clients, beneficial ownership must be identified.",
-                "Risk-Based Approach: Customer risk ratings should be assigned based on: country of residence, transaction volume, nature of business, and expected account activity. High-risk customers require more frequent monitoring and periodic review.",
-                "Ongoing Monitoring: All customer relationships must be subject to continuous monitoring. Unusual patterns, significant deviations from expected behavior, or changes in risk profile trigger immediate review and potential escalation.",
-            ],
-            "Sanctions Compliance": [
-                "Sanctions Screening: All transactions must be screened against OFAC, UN, EU, and local sanctions lists before processing. Real-time screening is required for wire transfers and cross-border payments.",
-                "Country Risk Assessment: Transactions involving high-risk jurisdictions (e.g., Iran, North Korea, Syria) are prohibited. Transactions with medium-risk countries require additional compliance checks and senior management approval.",
-                "Embargo Enforcement: Financial institutions must block and report any transactions involving sanctioned individuals, entities, or countries. Penalties for violations include fines up to $1 million and criminal prosecution.",
-            ],
-        }
-        
         # Determine document type from filename
-        doc_type = "General Compliance"
-        for key in mock_content.keys():
-            if key.lower().replace(" ", "_") in filename.lower():
-                doc_type = key
-                break
+        filename_lower = filename.lower()
+        doc_type = next(
+            (key for fragment, key in _MOCK_KEYS.items() if fragment in filename_lower),
+            "General Compliance",
+        )
         
         chunks = []
-        content_list = mock_content.get(doc_type, mock_content["AML Policy"])
+        content_list = _MOCK_CONTENT.get(doc_type, _MOCK_CONTENT["AML Policy"])
         
         for idx, text in enumerate(content_list):
-            chunk_id = str(uuid4())
+            chunk_id = uuid4().hex
             chunk = DocumentChunk(
                 chunk_id=chunk_id,
                 document_id=document_id,
@@ -251,13 +397,86 @@ class DocumentService:
                 metadata={"source": doc_type, "extraction_method": "mock"},
             )
             chunks.append(chunk)
-            self.chunks[chunk_id] = chunk
+            self._add_chunk(chunk)
         
         # Store document-chunk mapping
         self.document_chunks[document_id] = [c.chunk_id for c in chunks]
         
         return chunks
     
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        """Split text into lowercase alphanumeric tokens."""
+        return _TOKEN_RE.findall(text.lower())
+    
+    def _add_chunk(self, chunk: DocumentChunk) -> None:
+        """Store a chunk and add its tokens to the inverted index."""
+        chunk.text_z = self._intern_text(chunk.text_z)
+        self.chunks[chunk.chunk_id] = chunk
+        
+        # Tokenize once at ingest; queries never re-tokenize chunk text
+        term_counts = Counter(self._tokenize(chunk.text))
+        chunk.tokens = frozenset(term_counts)
+        for token, count in term_counts.items():
+            self._postings.setdefault(token, {})[chunk.chunk_id] = count
+        self._index_dirty = True
+    
+    def _remove_chunk(self, chunk_id: str) -> None:
+        """Remove a chunk and its inverted index entries."""
+        chunk = self.chunks.pop(chunk_id, None)
+        if chunk is None:
+            return
+        self._release_text(chunk.text_z)
+        
+        for token in chunk.tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self._postings[token]
+        self._index_dirty = True
+    
+    def _rebuild_weights(self) -> None:
+        """Recompute idf and per-chunk vector norms from the postings."""
+        n_chunks = len(self.chunks)
+        # Smoothed idf, as in scikit-learn's TfidfVectorizer
+        self._idf = {
+            token: math.log((1 + n_chunks) / (1 + len(postings))) + 1.0
+            for token, postings in self._postings.items()
+        }
+        
+        squared_norms: Dict[str, float] = {}
+        for token, postings in self._postings.items():
+            idf = self._idf[token]
+            for chunk_id, count in postings.items():
+                squared_norms[chunk_id] = squared_norms.get(chunk_id, 0.0) + (count * idf) ** 2
+        self._chunk_norms = {chunk_id: math.sqrt(sq) for chunk_id, sq in squared_norms.items()}
+        self._index_dirty = False
+    
+    def _intern_text(self, text_z: bytes) -> bytes:
+        """Return the pooled copy of a compressed chunk text, adding it if new."""
+        entry = self._text_pool.get(text_z)
+        if entry is None:
+            self._text_pool[text_z] = [text_z, 1]
+            return text_z
+        entry[1] += 1
+        return entry[0]
+    
+    def _release_text(self, text_z: bytes) -> None:
+        """Drop one reference to a pooled compressed chunk text."""
+        entry = self._text_pool.get(text_z)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._text_pool[text_z]
+    
+    @staticmethod
+    def build_query_terms(query: str) -> frozenset:
+        """Normalize a search query into the term set used for retrieval."""
+        return frozenset(DocumentService._tokenize(query))
+    
     def retrieve_relevant_chunks(
         self,
         query: str,
@@ -265,32 +484,57 @@ class DocumentService:
     ) -> List[DocumentChunk]:
         """
         Retrieve most relevant document chunks for a query.
-        Uses simple keyword matching (in production, use embeddings).
+        Ranks chunks by TF-IDF cosine similarity (in production, use embeddings).
         
         Args:
             query: Search query
             top_k: Number of chunks to return
             
+        Returns:
+            List of most relevant DocumentChunk objects
+        """
+        return self.retrieve_by_terms(self.build_query_terms(query), top_k=top_k)
+    
+    def retrieve_by_terms(
+        self,
+        query_terms: frozenset,
+        top_k: int = 3,
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve most relevant chunks for pre-computed query terms.
+        Skips query normalization so callers can reuse terms across requests.
+        
+        Args:
+            query_terms: Term set from build_query_terms()
+            top_k: Number of chunks to return
+            
         Returns:
             List of most relevant DocumentChunk objects
         """
         if not self.chunks:
             return []
         
-        # Simple keyword matching (in production, use embeddings)
-        query_terms = set(query.lower().split())
+        if self._index_dirty:
+            self._rebuild_weights()
+        
+        # Accumulate TF-IDF dot products, visiting only postings of query terms
+        scores: Dict[str, float] = {}
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf_sq = self._idf[term] ** 2
+            for chunk_id, count in postings.items():
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + count * idf_sq
         
-        # Score each chunk
-        scored_chunks = []
-        for chunk_id, chunk in self.chunks.items():
-            chunk_terms = set(chunk.text.lower().split())
-            overlap = len(query_terms.intersection(chunk_terms))
-            if overlap > 0:
-                scored_chunks.append((overlap, chunk))
+        # Cosine similarity (query norm is constant across chunks, so omitted)
+        norms = self._chunk_norms
+        for chunk_id in scores:
+            scores[chunk_id] /= norms[chunk_id]
         
-        # Sort by score and return top_k
-        scored_chunks.sort(key=lambda x: x[0], reverse=True)
-        return [chunk for _, chunk in scored_chunks[:top_k]]
+        # Bounded heap keeps only top_k candidates instead of sorting every match
+        top = heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+        return [self.chunks[chunk_id] for chunk_id, _ in top]
     
     def get_document_metadata(self, document_id: str) -> Optional[Dict[str, Any]]:
         """Get document metadata by ID."""
@@ -308,37 +552,58 @@ class DocumentService:
         # Delete chunks
         chunk_ids = self.document_chunks.get(document_id, [])
         for chunk_id in chunk_ids:
-            self.chunks.pop(chunk_id, None)
+            self._remove_chunk(chunk_id)
         
         # Delete document
         self.documents.pop(document_id, None)
         self.document_chunks.pop(document_id, None)
+        self._doc_text_cache.pop(document_id, None)
+        self._all_text_cache = None
         
         return True
     
     def get_all_chunks_text(self) -> str:
         """Get concatenated text from all chunks for RAG context."""
-        if not self.chunks:
-            return ""
+        if self._all_text_cache is not None:
+            return self._all_text_cache
         
         # Group chunks by document for better organization
         doc_texts = []
-        for doc_id, chunk_ids in self.document_chunks.items():
-            doc_meta = self.documents.get(doc_id, {})
-            doc_name = doc_meta.get("filename", "Unknown Document")
-            
-            chunk_texts = []
-            for chunk_id in chunk_ids:
-                chunk = self.chunks.get(chunk_id)
-                if chunk:
-                    chunk_texts.append(chunk.text)
-            
-            if chunk_texts:
-                doc_texts.append(f"=== {doc_name} ===\n" + "\n\n".join(chunk_texts))
+        for doc_id in self.document_chunks:
+            doc_text = self._doc_text_cache.get(doc_id)
+            if doc_text is None:
+                doc_text = self._render_document_text(doc_id)
+                self._doc_text_cache[doc_id] = doc_text
+            if doc_text:
+                doc_texts.append(doc_text)
+        
+        self._all_text_cache = "\n\n---\n\n".join(doc_texts)
+        return self._all_text_cache
+    
+    def _render_document_text(self, document_id: str) -> str:
+        """Render one document's chunks as a titled RAG context block."""
+        doc_meta = self.documents.get(document_id, {})
+        doc_name = doc_meta.get("filename", "Unknown Document")
         
-        return "\n\n---\n\n".join(doc_texts)
+        chunk_texts = []
+        for chunk_id in self.document_chunks.get(document_id, []):
+            chunk = self.chunks.get(chunk_id)
+            if chunk:
+                chunk_texts.append(chunk.text)
+        
+        if not chunk_texts:
+            return ""
+        return f"=== {doc_name} ===\n" + "\n\n".join(chunk_texts)
+
+
+# Global instance (created on first use)
+_document_service: Optional[DocumentService] = None
 
 
-# Global instance
-document_service = DocumentService()
+def get_document_service() -> DocumentService:
+    """Get the shared document service, creating it on first call."""
+    global _document_service
+    if _document_service is None:
+        _document_service = DocumentService()
+    return _document_service
 
@@ -5,7 +5,47 @@ Constructs optimized prompts for risk assessment explanations.
 See docs/AI_PROMPTS.md for prompt engineering guidelines.
 """
 
+from bisect import bisect_right
+from functools import lru_cache
 from typing import Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Optional: accurate token counts with tiktoken (falls back to ~4 characters per token)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tokenizer on first use (may download the BPE file); None if unavailable"""
+    if not TIKTOKEN_AVAILABLE:
+        logger.info("ℹ️  tiktoken not installed. Token counts will be estimated.")
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # Encoding file unavailable offline
+        logger.warning("⚠️ tiktoken encoding unavailable (%s). Token counts will be estimated.", e)
+        return None
+
+
+def _token_len(text: str) -> int:
+    """Count tokens in text"""
+    encoding = _get_encoding()
+    if encoding is None:
+        # Rough approximation: 1 token ≈ 4 characters
+        return len(text) // 4
+    # Model text may contain special-token strings such as "<|endoftext|>"; count them as plain text
+    return len(encoding.encode_ordinary(text))
+
+
+# Cached variant for prompts, which are often counted more than once
+_count_tokens = lru_cache(maxsize=1024)(_token_len)
 
 
 class PromptBuilder:
@@ -21,6 +61,122 @@ Guidelines:
 - Use professional, clear language
 - Consider both false positives and genuine risks"""
 
+    # Risk level lookup: bisect_right(RISK_LEVEL_THRESHOLDS, score) indexes RISK_LEVELS
+    RISK_LEVEL_THRESHOLDS = (0.4, 0.7)
+    RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+    # Prompt templates (str.format-ready; only per-case fields are substituted).
+    # Each starts with a static preamble so the leading tokens are byte-identical
+    # across calls (lets provider-side prefix caching skip re-processing them);
+    # per-case fields come last.
+    EXPLANATION_PREAMBLE = """Analyze this banking transaction for AML/fraud risk (details below).
+
+Provide:
+1. Brief explanation of why this transaction has its risk level
+2. Key risk factors (amount, country, account age, transaction velocity)
+3. Recommended action (approve, review, escalate)
+
+Keep your response concise (2-3 sentences per section).
+
+"""
+
+    EXPLANATION_TEMPLATE = EXPLANATION_PREAMBLE + """Transaction:
+Customer: {customer_name}
+Amount: ${amount:,.2f} USD
+Country: {country}
+Risk Score: {risk_score:.2f} ({risk_level} RISK){aml_context}
+
+Respond ONLY with the analysis above. Do not generate additional transactions or examples."""
+
+    RISK_SCORING_PREAMBLE = """Analyze this banking transaction and calculate a risk score (details below).
+
+Calculate a risk score between 0.0 (no risk) and 1.0 (very high risk) based on:
+1. Transaction amount (large amounts = higher risk)
+2. Country risk profile (high-risk jurisdictions)
+3. Typical patterns for this transaction type
+4. AML/fraud indicators
+
+Provide your response in EXACTLY this format:
+RISK_SCORE: [number between 0.0 and 1.0]
+REASONING: [2-3 sentence explanation of key risk factors]
+RISK_LEVEL: [LOW/MEDIUM/HIGH]
+
+"""
+
+    RISK_SCORING_TEMPLATE = RISK_SCORING_PREAMBLE + """Transaction:
+Customer: {customer_name}
+Transaction Amount: ${amount:,.2f} USD
+Country: {country}
+Transaction Type: {transaction_type}
+
+Respond ONLY with the analysis above. Do not generate additional examples."""
+
+    RISK_CATEGORY_TEMPLATE = """Classify the risk category of this banking transaction:
+        Customer: {customer_name}
+        Transaction Amount: ${amount:,.2f} USD
+        Country: {country}
+        Transaction Type: {transaction_type}
+        Possible risk categories:
+        1. Fraud
+        2. Money Laundering
+        3. Sanctions Violation
+        Provide your response in EXACTLY this format:
+        RISK_CATEGORY: [Fraud/Money Laundering/Sanctions Violation]
+        REASONING: [2-3 sentence explanation of key risk factors]
+        """
+
+    REPORT_SUMMARY_TEMPLATE = """Generate an executive summary for this risk assessment report:
+
+Total Cases: {total_cases}
+Total Transaction Volume: ${total_amount:,.2f} USD
+Average Risk Score: {avg_risk:.2f}
+
+Risk Distribution:
+- High Risk (≥0.7): {high_risk_count} cases
+- Medium Risk (0.4-0.69): {medium_risk_count} cases
+- Low Risk (<0.4): {low_risk_count} cases
+
+Provide a brief (2-3 sentence) executive summary highlighting:
+1. Overall risk assessment
+2. Key concerns or patterns
+3. Recommended priority actions
+
+Be concise and actionable."""
+
+    # Compliance RAG prompt: the documents block is static per document set, so it
+    # leads; the transaction block follows
+    COMPLIANCE_DOCUMENTS_TEMPLATE = """You are a compliance analyst reviewing a banking transaction. Use the provided compliance documents to determine if this transaction violates any regulations.
+
+=== COMPLIANCE DOCUMENTS ===
+{document_context}
+=== END DOCUMENTS ===
+
+=== INSTRUCTIONS ===
+Based on the compliance documents above, analyze the transaction below and provide your assessment in EXACTLY this format:
+
+COMPLIANCE_STATUS: [COMPLIANT/NON_COMPLIANT/REVIEW_REQUIRED]
+VIOLATIONS: [List any potential violations, one per line, or "None" if compliant]
+RELEVANT_REGULATIONS: [List applicable regulations from the documents, one per line]
+RECOMMENDATION: [Your specific recommendation for this transaction]
+CONFIDENCE: [number between 0.0 and 1.0 indicating your confidence in this analysis]
+
+Example:
+COMPLIANCE_STATUS: REVIEW_REQUIRED
+VIOLATIONS: Transaction exceeds $10,000 threshold requiring enhanced due diligence
+RELEVANT_REGULATIONS: AML Policy - Enhanced Due Diligence requirement; KYC Guidelines - Risk-Based Approach
+RECOMMENDATION: Conduct enhanced due diligence before processing. Verify source of funds and beneficial ownership.
+CONFIDENCE: 0.85
+
+"""
+
+    COMPLIANCE_TRANSACTION_TEMPLATE = """=== TRANSACTION TO ANALYZE ===
+Customer: {customer_name}
+Amount: ${amount:,.2f} USD
+Country: {country}
+Current Risk Score: {risk_score:.2f} (0.0 = low risk, 1.0 = high risk){aml_indicators}
+
+Respond ONLY with the assessment in the format above. Do not generate additional examples."""
+
     def __init__(self):
         """Initialize the prompt builder"""
         pass
@@ -47,38 +203,23 @@ Guidelines:
             Formatted prompt string for watsonx.ai
         """
         # Determine risk level
-        if risk_score >= 0.7:
-            risk_level = "HIGH"
-        elif risk_score >= 0.4:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "LOW"
+        risk_level = self.RISK_LEVELS[bisect_right(self.RISK_LEVEL_THRESHOLDS, risk_score)]
 
         # Build AML context
-        aml_context = ""
+        context_lines = []
         if account_age_days is not None:
-            aml_context += f"\nAccount Age: {account_age_days} days"
+            context_lines.append(f"\nAccount Age: {account_age_days} days")
         if transaction_count_30d is not None:
-            aml_context += f"\nTransaction Velocity: {transaction_count_30d} large transactions in past 30 days"
+            context_lines.append(f"\nTransaction Velocity: {transaction_count_30d} large transactions in past 30 days")
         
-        # Build the user prompt
-        user_prompt = f"""Analyze this banking transaction for AML/fraud risk:
-
-Customer: {customer_name}
-Amount: ${amount:,.2f} USD
-Country: {country}
-Risk Score: {risk_score:.2f} ({risk_level} RISK){aml_context}
-
-Provide:
-1. Brief explanation of why this transaction has a {risk_level} risk score
-2. Key risk factors (amount, country, account age, transaction velocity)
-3. Recommended action (approve, review, escalate)
-
-Keep your response concise (2-3 sentences per section).
-
-Respond ONLY with the analysis above. Do not generate additional transactions or examples."""
-
-        return user_prompt
+        return self.EXPLANATION_TEMPLATE.format(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            risk_score=risk_score,
+            risk_level=risk_level,
+            aml_context="".join(context_lines),
+        )
 
     def build_risk_category_prompt(
         self,
@@ -96,20 +237,12 @@ Respond ONLY with the analysis above. Do not generate additional transactions or
             country: Country code (e.g., "USA", "SG")
             transaction_type: Type of transaction
         """
-        prompt = f"""Classify the risk category of this banking transaction:
-        Customer: {custoner_name}
-        Transaction Amount: ${amount:,.2f} USD
-        Country: {country}
-        Transaction Type: {transaction_type}
-        Possible risk categories:
-        1. Fraud
-        2. Money Laundering
-        3. Sanctions Violation
-        Provide your response in EXACTLY this format:
-        RISK_CATEGORY: [Fraud/Money Laundering/Sanctions Violation]
-        REASONING: [2-3 sentence explanation of key risk factors]
-        """
-        return prompt
+        return self.RISK_CATEGORY_TEMPLATE.format(
+            customer_name=custoner_name,
+            amount=amount,
+            country=country,
+            transaction_type=transaction_type,
+        )
 
     def build_risk_scoring_prompt(
         self,
@@ -130,27 +263,12 @@ Respond ONLY with the analysis above. Do not generate additional transactions or
         Returns:
             Formatted prompt for risk score generation
         """
-        user_prompt = f"""Analyze this banking transaction and calculate a risk score:
-
-Customer: {customer_name}
-Transaction Amount: ${amount:,.2f} USD
-Country: {country}
-Transaction Type: {transaction_type}
-
-Calculate a risk score between 0.0 (no risk) and 1.0 (very high risk) based on:
-1. Transaction amount (large amounts = higher risk)
-2. Country risk profile (high-risk jurisdictions)
-3. Typical patterns for this transaction type
-4. AML/fraud indicators
-
-Provide your response in EXACTLY this format:
-RISK_SCORE: [number between 0.0 and 1.0]
-REASONING: [2-3 sentence explanation of key risk factors]
-RISK_LEVEL: [LOW/MEDIUM/HIGH]
-
-Respond ONLY with the analysis above. Do not generate additional examples."""
-
-        return user_prompt
+        return self.RISK_SCORING_TEMPLATE.format(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            transaction_type=transaction_type,
+        )
 
     def build_report_summary_prompt(
         self,
@@ -175,25 +293,14 @@ Respond ONLY with the analysis above. Do not generate additional examples."""
         Returns:
             Formatted prompt string for report summary
         """
-        user_prompt = f"""Generate an executive summary for this risk assessment report:
-
-Total Cases: {total_cases}
-Total Transaction Volume: ${total_amount:,.2f} USD
-Average Risk Score: {avg_risk:.2f}
-
-Risk Distribution:
-- High Risk (≥0.7): {high_risk_count} cases
-- Medium Risk (0.4-0.69): {medium_risk_count} cases
-- Low Risk (<0.4): {low_risk_count} cases
-
-Provide a brief (2-3 sentence) executive summary highlighting:
-1. Overall risk assessment
-2. Key concerns or patterns
-3. Recommended priority actions
-
-Be concise and actionable."""
-
-        return user_prompt
+        return self.REPORT_SUMMARY_TEMPLATE.format(
+            total_cases=total_cases,
+            high_risk_count=high_risk_count,
+            medium_risk_count=medium_risk_count,
+            low_risk_count=low_risk_count,
+            avg_risk=avg_risk,
+            total_amount=total_amount,
+        )
 
     def format_full_prompt(self, user_prompt: str) -> str:
         """
@@ -209,23 +316,38 @@ Be concise and actionable."""
 
 {user_prompt}"""
 
+    def count_tokens(self, text: str, cache: bool = True) -> int:
+        """
+        Count tokens in text for budget pre-flight checks
+
+        Args:
+            text: Prompt or response text
+            cache: Memoize the count (leave off for one-off text such as model output)
+
+        Returns:
+            Token count (approximate if tiktoken is unavailable)
+        """
+        return _count_tokens(text) if cache else _token_len(text)
+
     def optimize_for_token_limit(self, prompt: str, max_tokens: int = 500) -> str:
         """
         Ensure prompt fits within token budget
 
         Args:
             prompt: The prompt to optimize
-            max_tokens: Maximum allowed tokens (approximate)
+            max_tokens: Maximum allowed tokens
 
         Returns:
             Optimized prompt (truncated if necessary)
         """
-        # Rough approximation: 1 token ≈ 4 characters
-        max_chars = max_tokens * 4
-
-        if len(prompt) > max_chars:
-            # Truncate and add ellipsis
-            return prompt[:max_chars - 20] + "\n\n[Note: Response truncated]"
+        if _count_tokens(prompt) <= max_tokens:
+            return prompt
 
-        return prompt
+        encoding = _get_encoding()
+        if encoding is None:
+            # Rough approximation: 1 token ≈ 4 characters
+            return prompt[:max_tokens * 4 - 20] + "\n\n[Note: Response truncated]"
 
+        # Truncate on a token boundary, leaving room for the note
+        token_ids = encoding.encode_ordinary(prompt)
+        return encoding.decode(token_ids[:max_tokens - 8]) + "\n\n[Note: Response truncated]"
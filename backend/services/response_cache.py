@@ -0,0 +1,79 @@
+"""
+Response Cache
+
+Caches watsonx.ai responses by prompt so repeated requests skip the LLM call.
+Entries expire after a TTL (1 hour by default, see CONTRIBUTING.md).
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+import hashlib
+import threading
+import time
+
+
+class ResponseCache:
+    """Size-capped LRU cache with TTL expiry for generated responses"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Initialize response cache
+
+        Args:
+            max_entries: Maximum number of cached responses (least recently used evicted first)
+            ttl_seconds: Seconds before a cached response expires
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()  # Bulk generation reads/writes from worker threads
+
+    @staticmethod
+    def make_key(prompt: str, model_id: str = "") -> str:
+        """Build a cache key from a hash of the model ID and prompt"""
+        return hashlib.blake2b(f"{model_id}|{prompt}".encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Cached response, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, response = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: str):
+        """
+        Store a response, evicting the least recently used entry if full
+
+        Args:
+            key: Cache key from make_key()
+            response: Raw model response
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -5,9 +5,14 @@ Monitors watsonx.ai API usage to stay within budget.
 Budget: $250 USD for the challenge.
 """
 
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List
+import atexit
 import json
+import os
+import threading
+import time
 from pathlib import Path
 
 
@@ -18,50 +23,134 @@ class TokenTracker:
     # Granite-13b-instruct-v2 pricing: ~$0.0001 per 1K tokens
     COST_PER_1K_TOKENS = 0.0001
 
-    def __init__(self, budget_usd: float = 250.0, storage_path: str = "./token_usage.json"):
+    def __init__(
+        self,
+        budget_usd: float = 250.0,
+        storage_path: str = "./token_usage.json",
+        snapshot_every: int = 50,
+        recent_limit: int = 1000,
+    ):
         """
         Initialize token tracker
 
+        Requests are appended to a JSONL log next to storage_path; storage_path
+        holds a periodic snapshot of the aggregates and the log offset it covers.
+
         Args:
             budget_usd: Total budget in USD
             storage_path: Path to store usage data
+            snapshot_every: Requests between aggregate snapshots
+            recent_limit: Number of recent requests kept in memory
         """
         self.budget_usd = budget_usd
+        # Budget as a whole token count, so pre-flight checks are one integer compare
+        self._budget_tokens = round(budget_usd * 1000 / self.COST_PER_1K_TOKENS)
         self.storage_path = Path(storage_path)
+        self.log_path = self.storage_path.with_suffix(".jsonl")
+        self.snapshot_every = snapshot_every
+        self._unsaved_requests = 0
+        self._recent: deque = deque(maxlen=recent_limit)  # Full history lives in the log
+        self.timeouts = 0  # Timed-out generation attempts in this process
+        self._lock = threading.Lock()  # Requests are tracked from worker threads
         self.usage_data = self._load_usage_data()
 
+        # Line-buffered append-only request log
+        self._log_fh = open(self.log_path, "a", buffering=1)
+        atexit.register(self.close)
+
+    @staticmethod
+    def _empty_usage_data() -> Dict[str, Any]:
+        """Build zeroed usage aggregates"""
+        return {
+            "total_tokens": 0,
+            "total_requests": 0,
+            "total_cost_usd": 0.0,
+            "cache_hits": 0,
+            "log_offset": 0,
+            "started_at": time.time(),
+        }
+
     def _load_usage_data(self) -> Dict[str, Any]:
-        """Load existing usage data from disk"""
+        """Load the last snapshot from disk and replay newer log records"""
+        usage_data = self._empty_usage_data()
+
         if self.storage_path.exists():
             try:
                 with open(self.storage_path, "r") as f:
-                    return json.load(f)
+                    snapshot = json.load(f)
+                for key in usage_data:
+                    if key in snapshot:
+                        usage_data[key] = snapshot[key]
             except (json.JSONDecodeError, IOError):
                 pass
 
-        # Initialize new usage data
-        return {
-            "total_tokens": 0,
-            "total_requests": 0,
-            "total_cost_usd": 0.0,
-            "requests": [],
-            "started_at": datetime.now().isoformat(),
-        }
+        if self.log_path.exists():
+            try:
+                with open(self.log_path, "rb") as f:
+                    f.seek(usage_data["log_offset"])
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Skip a partially written trailing line
+                        self._apply_record(usage_data, record)
+                    usage_data["log_offset"] = f.tell()
+            except IOError:
+                pass
+
+        return usage_data
 
     def _save_usage_data(self):
-        """Save usage data to disk"""
+        """Save an aggregate snapshot to disk"""
+        self.usage_data["log_offset"] = self._log_fh.tell()
+        tmp_path = self.storage_path.with_suffix(".tmp")
         try:
-            with open(self.storage_path, "w") as f:
-                json.dump(self.usage_data, f, indent=2)
+            # Write to a temp file and rename so a crash never leaves a torn snapshot
+            with open(tmp_path, "w") as f:
+                json.dump(self.usage_data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.storage_path)
+            self._unsaved_requests = 0
         except IOError as e:
             print(f"Warning: Failed to save token usage data: {e}")
 
+    def _apply_record(self, usage_data: Dict[str, Any], record: Dict[str, Any]):
+        """Add a request record to the running aggregates"""
+        if record.get("cache_hit"):
+            usage_data["cache_hits"] += 1
+            return
+
+        usage_data["total_tokens"] += record["tokens"]
+        usage_data["total_requests"] += 1
+        usage_data["total_cost_usd"] += record["cost_usd"]
+
+    def _append_record(self, record: Dict[str, Any]):
+        """Append a request to the log, snapshotting aggregates periodically"""
+        self._apply_record(self.usage_data, record)
+        self._recent.append(record)
+        try:
+            self._log_fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except (IOError, ValueError) as e:
+            print(f"Warning: Failed to log token usage: {e}")
+
+        self._unsaved_requests += 1
+        if self._unsaved_requests >= self.snapshot_every:
+            self._save_usage_data()
+
+    def close(self):
+        """Flush the aggregate snapshot and close the request log"""
+        with self._lock:
+            if self._log_fh.closed:
+                return
+            self._save_usage_data()
+            self._log_fh.close()
+
     def track_request(
         self,
         tokens_used: int,
         model: str,
         endpoint: str,
         metadata: Dict[str, Any] = None,
+        cache_hit: bool = False,
     ):
         """
         Record a new API request
@@ -71,27 +160,69 @@ class TokenTracker:
             model: Model name (e.g., "granite-3-2-8b-instruct")
             endpoint: API endpoint called (e.g., "/explain", "/report")
             metadata: Additional metadata (case_id, etc.)
+            cache_hit: Response was served from cache (no tokens spent)
+        """
+        record = self._build_record(tokens_used, model, endpoint, metadata, cache_hit)
+        with self._lock:
+            self._append_record(record)
+
+    def track_requests(self, requests: Iterable[Dict[str, Any]]):
+        """
+        Record several API requests with a single log write
+
+        Args:
+            requests: Dicts of track_request keyword arguments
+                (tokens_used, model, endpoint, optional metadata and cache_hit)
         """
-        cost = self._calculate_cost(tokens_used)
+        records = [self._build_record(**request) for request in requests]
+        if not records:
+            return
+
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with self._lock:
+            for record in records:
+                self._apply_record(self.usage_data, record)
+            self._recent.extend(records)
+            try:
+                self._log_fh.write(lines)
+            except (IOError, ValueError) as e:
+                print(f"Warning: Failed to log token usage: {e}")
 
-        # Update totals
-        self.usage_data["total_tokens"] += tokens_used
-        self.usage_data["total_requests"] += 1
-        self.usage_data["total_cost_usd"] += cost
+            self._unsaved_requests += len(records)
+            if self._unsaved_requests >= self.snapshot_every:
+                self._save_usage_data()
 
-        # Record individual request
-        request_record = {
-            "timestamp": datetime.now().isoformat(),
+    def _build_record(
+        self,
+        tokens_used: int,
+        model: str,
+        endpoint: str,
+        metadata: Dict[str, Any] = None,
+        cache_hit: bool = False,
+    ) -> Dict[str, Any]:
+        """Build a log record for one request"""
+        if cache_hit:
+            # No model call was made, so only count the hit
+            return {
+                "ts": time.time(),
+                "model": model,
+                "endpoint": endpoint,
+                "cache_hit": True,
+            }
+
+        return {
+            "ts": time.time(),
             "tokens": tokens_used,
-            "cost_usd": cost,
+            "cost_usd": self._calculate_cost(tokens_used),
             "model": model,
             "endpoint": endpoint,
             "metadata": metadata or {},
         }
-        self.usage_data["requests"].append(request_record)
 
-        # Save to disk
-        self._save_usage_data()
+    def record_timeout(self):
+        """Count a timed-out generation attempt (no tokens are billed)"""
+        with self._lock:
+            self.timeouts += 1
 
     def _calculate_cost(self, tokens: int) -> float:
         """Calculate cost in USD for given tokens"""
@@ -114,10 +245,28 @@ class TokenTracker:
             "remaining_usd": round(remaining, 4),
             "tokens_used": self.usage_data["total_tokens"],
             "requests_count": self.usage_data["total_requests"],
+            "cache_hits": self.usage_data.get("cache_hits", 0),
+            "timeouts": self.timeouts,
             "percentage_used": round(percentage_used, 2),
-            "started_at": self.usage_data.get("started_at"),
+            "started_at": self._format_timestamp(self.usage_data.get("started_at")),
         }
 
+    @staticmethod
+    def _format_timestamp(ts: Any) -> Any:
+        """Format a stored epoch timestamp as ISO 8601 (older files store strings)"""
+        if isinstance(ts, (int, float)):
+            return datetime.fromtimestamp(ts).isoformat()
+        return ts
+
+    def get_recent_requests(self) -> List[Dict[str, Any]]:
+        """Get the most recent request records (oldest first)"""
+        with self._lock:
+            recent = list(self._recent)
+        return [
+            {**record, "ts": self._format_timestamp(record["ts"])}
+            for record in recent
+        ]
+
     def is_within_budget(self, estimated_tokens: int = 0) -> bool:
         """
         Check if we're within budget
@@ -128,9 +277,8 @@ class TokenTracker:
         Returns:
             True if within budget, False otherwise
         """
-        estimated_cost = self._calculate_cost(estimated_tokens)
-        total_projected = self.usage_data["total_cost_usd"] + estimated_cost
-        return total_projected < self.budget_usd
+        # Cost is linear in tokens, so compare token counts instead of dollars
+        return self.usage_data["total_tokens"] + estimated_tokens < self._budget_tokens
 
     def get_remaining_budget(self) -> float:
         """Get remaining budget in USD"""
@@ -171,12 +319,9 @@ class TokenTracker:
 
     def reset_usage(self):
         """Reset usage data (use with caution!)"""
-        self.usage_data = {
-            "total_tokens": 0,
-            "total_requests": 0,
-            "total_cost_usd": 0.0,
-            "requests": [],
-            "started_at": datetime.now().isoformat(),
-        }
-        self._save_usage_data()
-
+        with self._lock:
+            self._log_fh.seek(0)
+            self._log_fh.truncate()
+            self._recent.clear()
+            self.usage_data = self._empty_usage_data()
+            self._save_usage_data()
@@ -0,0 +1,163 @@
+"""
+watsonx.ai REST Client
+
+Calls the watsonx.ai text generation REST API directly over one pooled,
+keep-alive HTTP client, instead of going through the SDK's per-call requests.
+Exposes the same generate_text / generate_text_stream interface as the SDK Model,
+so WatsonXService can use either.
+
+Enable with WATSONX_HTTP_CLIENT=true (requires httpx).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
+import json
+import threading
+import time
+
+# Optional: httpx (only needed when the REST client is enabled)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+
+class WatsonxHTTPModel:
+    """Minimal watsonx.ai text generation client with IAM token caching"""
+
+    API_VERSION = "2023-05-29"
+    IAM_URL = "https://iam.cloud.ibm.com/identity/token"
+    TOKEN_REFRESH_MARGIN_S = 60  # Refresh the bearer token this long before it expires
+
+    def __init__(
+        self,
+        model_id: str,
+        url: str,
+        api_key: str,
+        project_id: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_connections: int = 64,
+        timeout_s: float = 60.0,
+    ):
+        """
+        Initialize REST client
+
+        Args:
+            model_id: Model to generate with
+            url: watsonx.ai regional endpoint (e.g. https://us-south.ml.cloud.ibm.com)
+            api_key: IBM Cloud API key (exchanged for IAM bearer tokens)
+            project_id: watsonx.ai project ID
+            params: Generation parameters (decoding_method, max_new_tokens, ...)
+            max_connections: Connection pool size (idle connections are kept alive)
+            timeout_s: HTTP timeout per request
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for the watsonx.ai REST client")
+
+        self.model_id = model_id
+        self.url = url.rstrip("/")
+        self.api_key = api_key
+        self.project_id = project_id
+        self.params = params or {}
+        self._client = httpx.Client(
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2),
+        )
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+
+    def _bearer_token(self) -> str:
+        """Get a cached IAM bearer token, refreshing it shortly before expiry"""
+        with self._token_lock:
+            if self._token is None or time.time() >= self._token_expires_at - self.TOKEN_REFRESH_MARGIN_S:
+                response = self._client.post(
+                    self.IAM_URL,
+                    data={
+                        "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
+                        "apikey": self.api_key,
+                    },
+                    headers={"Accept": "application/json"},
+                )
+                response.raise_for_status()
+                token_data = response.json()
+                self._token = token_data["access_token"]
+                self._token_expires_at = token_data["expiration"]
+            return self._token
+
+    def _request_body(self, prompt: str) -> Dict[str, Any]:
+        """Build a text generation request body"""
+        return {
+            "model_id": self.model_id,
+            "input": prompt,
+            "parameters": self.params,
+            "project_id": self.project_id,
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self._bearer_token()}",
+            "Accept": "application/json",
+        }
+
+    def generate_text(self, prompt: Union[str, List[str]]) -> Union[str, List[str]]:
+        """
+        Generate text for a prompt (or a list of prompts, sent concurrently)
+
+        Args:
+            prompt: Prompt, or list of prompts
+
+        Returns:
+            Generated text, or a list of generated texts in prompt order
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        if isinstance(prompt, list):
+            # Requests share the pooled connections
+            with ThreadPoolExecutor(max_workers=min(len(prompt), 8) or 1) as pool:
+                return list(pool.map(self.generate_text, prompt))
+
+        response = self._client.post(
+            f"{self.url}/ml/v1/text/generation",
+            params={"version": self.API_VERSION},
+            json=self._request_body(prompt),
+            headers=self._headers(),
+        )
+        response.raise_for_status()
+        return response.json()["results"][0]["generated_text"]
+
+    def generate_text_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream generated text as server-sent events arrive
+
+        Args:
+            prompt: Prompt
+
+        Yields:
+            Generated text chunks
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        with self._client.stream(
+            "POST",
+            f"{self.url}/ml/v1/text/generation_stream",
+            params={"version": self.API_VERSION},
+            json=self._request_body(prompt),
+            headers=self._headers(),
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                for result in event.get("results", ()):
+                    if result.get("generated_text"):
+                        yield result["generated_text"]
+
+    def close(self):
+        """Close pooled connections"""
+        self._client.close()
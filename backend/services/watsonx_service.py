@@ -8,26 +8,150 @@ NOTE: Requires Python 3.10+ for IBM Watson ML SDK.
 Falls back to mock responses if SDK unavailable.
 """
 
-from typing import Dict, Any, Optional
+from bisect import bisect_left, bisect_right
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
+import asyncio
+import atexit
+import logging
+import math
+import re
+import threading
 import time
 
 from config import get_settings
+from services.batch_dispatcher import BatchDispatcher
 from services.prompt_builder import PromptBuilder
+from services.response_cache import ResponseCache
+from services.watsonx_http import WatsonxHTTPModel
 from services.token_tracker import TokenTracker
 
+logger = logging.getLogger(__name__)
+
+# Risk score response fields (compiled once at import)
+_SCORE_RE = re.compile(r'RISK_SCORE:\s*(0?\.\d+|1\.0|0|1)', re.IGNORECASE)
+_REASONING_RE = re.compile(r'REASONING:\s*(.+?)(?=RISK_LEVEL:|$)', re.IGNORECASE | re.DOTALL)
+_LEVEL_RE = re.compile(r'RISK_LEVEL:\s*(LOW|MEDIUM|HIGH)', re.IGNORECASE)
+
+# Explanation action headings, in priority order (case-insensitive)
+# Handles numbered list format: "3. Recommended action:"
+_ACTION_RES = (
+    re.compile(r'(?:^\d+\.\s*)?Recommended action:\s*', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'(?:^\d+\.\s*)?Recommendation:\s*', re.IGNORECASE | re.MULTILINE),
+)
+
+# All three fields in response order, so well-formed responses are scanned once
+_RISK_RE = re.compile(
+    r'RISK_SCORE:\s*(?P<score>0?\.\d+|1\.0|0|1)'
+    r'.*?REASONING:\s*(?P<reason>.+?)(?=RISK_LEVEL:|$)'
+    r'(?:RISK_LEVEL:\s*(?P<level>LOW|MEDIUM|HIGH))?',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Prompt echo / hallucinated follow-on examples: the response is cut at the first match
+_PROMPT_CUT_RE = re.compile(r"Prompt(?: 2)?:|Example:|Another example:|Analyze this banking transaction")
+_PROMPT_CUT_MAX_LEN = len("Analyze this banking transaction")  # Longest marker (held back while streaming)
+# Meta-text lead-ins, removed in this order when stacked
+_META_PREFIX_RE = re.compile(r"^(?:Here is the analysis:\s*)?(?:Here's the analysis:\s*)?(?:Analysis:\s*)?")
+
+# Incomplete numbered list items ("3." with no content), mid-text and at the end
+_EMPTY_ITEM_RE = re.compile(r'\n\d+\.\s*\n')
+_TRAILING_NUM_RE = re.compile(r'\n\d+\.\s*$')
+
+# Risk category response fields
+_CATEGORY_RE = re.compile(r'RISK_CATEGORY:\s*(.+?)(?=REASONING:|$)', re.IGNORECASE | re.DOTALL)
+_CATEGORY_REASONING_RE = re.compile(r'REASONING:\s*(.+)', re.IGNORECASE | re.DOTALL)
+
+# Compliance analysis response fields
+_COMPLIANCE_STATUS_RE = re.compile(
+    r'COMPLIANCE_STATUS:\s*(COMPLIANT|NON_COMPLIANT|REVIEW_REQUIRED)', re.IGNORECASE
+)
+_VIOLATIONS_RE = re.compile(r'VIOLATIONS:\s*(.+?)(?=RELEVANT_REGULATIONS:|$)', re.IGNORECASE | re.DOTALL)
+_REGULATIONS_RE = re.compile(r'RELEVANT_REGULATIONS:\s*(.+?)(?=RECOMMENDATION:|$)', re.IGNORECASE | re.DOTALL)
+_RECOMMENDATION_RE = re.compile(r'RECOMMENDATION:\s*(.+?)(?=CONFIDENCE:|$)', re.IGNORECASE | re.DOTALL)
+_CONFIDENCE_RE = re.compile(r'CONFIDENCE:\s*(0?\.\d+|1\.0|0|1)', re.IGNORECASE)
+
+# All five compliance fields in response order, so well-formed responses are scanned once
+_COMPLIANCE_RE = re.compile(
+    r'COMPLIANCE_STATUS:\s*(?P<status>COMPLIANT|NON_COMPLIANT|REVIEW_REQUIRED)\s*'
+    r'VIOLATIONS:\s*(?P<violations>.+?)RELEVANT_REGULATIONS:\s*'
+    r'(?P<regulations>.+?)RECOMMENDATION:\s*'
+    r'(?P<recommendation>.+?)CONFIDENCE:\s*'
+    r'(?P<confidence>0?\.\d+|1\.0|0|1)',
+    re.IGNORECASE | re.DOTALL,
+)
+
 # Try to import IBM Watson ML SDK (requires Python 3.10+)
 try:
     from ibm_watson_machine_learning.foundation_models import Model
     from ibm_watson_machine_learning.metanames import GenTextParamsMetaNames as GenParams
     WATSONX_AVAILABLE = True
 except ImportError as e:
-    print(f"⚠️ IBM Watson ML SDK not available: {e}")
-    print("   Requires Python 3.10+. Falling back to mock AI responses.")
+    logger.warning(
+        "⚠️ IBM Watson ML SDK not available: %s. Requires Python 3.10+. Falling back to mock AI responses.", e
+    )
     WATSONX_AVAILABLE = False
     Model = None
     GenParams = None
 
 
+def _split_bullets(text: str) -> List[str]:
+    """Split a newline/semicolon separated list, dropping blank items and bullet marks"""
+    items = []
+    for line in text.split("\n"):
+        for item in line.split(";"):
+            if item.strip():
+                items.append(item.strip("- •").strip())
+    return items
+
+
+# PromptBuilder is stateless, so every service instance shares one
+_PROMPT_BUILDER = PromptBuilder()
+
+
+class _ModelCall:
+    """
+    One model call on its own daemon thread
+
+    The thread waits for a concurrency slot, then runs the call. A dedicated thread
+    (rather than a pool worker) means a call abandoned after a timeout never holds up
+    later requests: abandon_slot() gives its slot back right away, and the call still
+    runs to completion.
+    """
+
+    def __init__(self, slots: threading.BoundedSemaphore, call: Callable[[], Any]):
+        self.started: Future = Future()  # Resolved once the call holds a slot (cancel it to skip the call)
+        self.result: Future = Future()
+        self._slots = slots
+        self._slot_lock = threading.Lock()
+        self._holds_slot = False
+        threading.Thread(target=self._run, args=(call,), name="watsonx-call", daemon=True).start()
+
+    def _run(self, call: Callable[[], Any]):
+        self._slots.acquire()
+        with self._slot_lock:
+            self._holds_slot = True
+        if not self.started.set_running_or_notify_cancel():
+            self.abandon_slot()
+            self.result.cancel()
+            return
+        self.started.set_result(None)
+        try:
+            self.result.set_result(call())
+        except BaseException as e:
+            self.result.set_exception(e)
+        finally:
+            self.abandon_slot()
+
+    def abandon_slot(self):
+        """Release the concurrency slot (once), whether or not the call has finished"""
+        with self._slot_lock:
+            if self._holds_slot:
+                self._holds_slot = False
+                self._slots.release()
+
+
 class WatsonXService:
     """Service for interacting with IBM watsonx.ai"""
 
@@ -38,45 +162,90 @@ class WatsonXService:
     # Note: Will be None if SDK not available
     DEFAULT_PARAMS = None
     
+    # Keyed by REST API name (the direct REST client sends these as-is)
+    GENERATION_PARAMS = {
+        "decoding_method": "greedy",
+        "max_new_tokens": 800,  # Increased for complete responses
+        "min_new_tokens": 50,
+        "temperature": 0.3,
+        "top_k": 50,
+        "top_p": 0.9,
+        "repetition_penalty": 1.1,
+        "stop_sequences": ["Prompt:", "\n\nPrompt:"],  # Stop if echoing prompt
+    }
+    
+    # Base confidence by risk score band: extreme scores are more confident.
+    # Bands are closed toward the extremes (<= 0.2, <= 0.4 | >= 0.6, >= 0.8)
+    CONFIDENCE_THRESHOLDS = (0.2, 0.4, 0.6, 0.8)
+    CONFIDENCE_LEVELS = (0.9, 0.75, 0.6, 0.75, 0.9)
+    
     @classmethod
+    @lru_cache(maxsize=1)
     def _get_params(cls):
-        """Get generation parameters (only if SDK available)"""
+        """Get generation parameters (only if SDK available; built once)"""
         if not WATSONX_AVAILABLE or GenParams is None:
             return None
-        return {
-            GenParams.DECODING_METHOD: "greedy",
-            GenParams.MAX_NEW_TOKENS: 800,  # Increased for complete responses
-            GenParams.MIN_NEW_TOKENS: 50,
-            GenParams.TEMPERATURE: 0.3,
-            GenParams.TOP_K: 50,
-            GenParams.TOP_P: 0.9,
-            GenParams.REPETITION_PENALTY: 1.1,
-            GenParams.STOP_SEQUENCES: ["Prompt:", "\n\nPrompt:"],  # Stop if echoing prompt
-        }
+        return {getattr(GenParams, name.upper()): value for name, value in cls.GENERATION_PARAMS.items()}
 
     def __init__(self):
         """Initialize watsonx.ai service"""
         self.settings = get_settings()
-        self.prompt_builder = PromptBuilder()
+        self.prompt_builder = _PROMPT_BUILDER
         self.token_tracker = TokenTracker(budget_usd=self.settings.token_budget_usd)
+        self.response_cache = ResponseCache(
+            max_entries=self.settings.response_cache_max_entries,
+            ttl_seconds=self.settings.response_cache_ttl_seconds,
+        )
+        # Near-duplicate explanations and compliance analyses (opt-in; keyed on bucketed transaction features)
+        self.similar_cache = ResponseCache(
+            max_entries=self.settings.response_cache_max_entries,
+            ttl_seconds=self.settings.response_cache_ttl_seconds,
+        )
+        
+        # Queues async requests before they take a model call slot (see _call_slots)
+        self._semaphore = asyncio.Semaphore(self.settings.watsonx_concurrency)
+        
+        # Optional micro-batching of async requests into one multi-prompt model call
+        self._batcher: Optional[BatchDispatcher] = None
+        if self.settings.watsonx_batch_window_ms > 0:
+            self._batcher = BatchDispatcher(
+                self._generate_batch,
+                max_batch_size=self.settings.watsonx_batch_size,
+                max_wait_s=self.settings.watsonx_batch_window_ms / 1000,
+                semaphore=self._semaphore,
+                on_abandoned=self._track_abandoned,
+            )
+        
+        # Bounds concurrent model calls from both the sync and async paths; each call takes
+        # a slot on its worker thread. A call that exceeds request_timeout_s gives up its
+        # slot and finishes on its own thread (see _ModelCall)
+        self._call_slots = threading.BoundedSemaphore(self.settings.watsonx_concurrency)
+        
+        # Usage tracking (disk writes) runs on one background thread, off the response path.
+        # A single worker keeps tracker updates ordered and single-threaded.
+        self._track_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-tracker")
+        atexit.register(self._track_executor.shutdown, wait=True)  # Runs before the tracker closes
         
         # Initialize the model
         self._model: Optional[Model] = None
         self._initialize_model()
+        self._available = self._model is not None  # Fixed after init; checked on every request
 
     def _initialize_model(self):
         """Initialize the IBM watsonx.ai model"""
+        if self.settings.watsonx_http_client:
+            self._initialize_http_model()
+            return
+        
         # Check if SDK is available
         if not WATSONX_AVAILABLE:
-            print("ℹ️  watsonx.ai SDK not available (requires Python 3.10+)")
-            print("   Using mock AI responses instead")
+            logger.info("ℹ️  watsonx.ai SDK not available (requires Python 3.10+). Using mock AI responses instead")
             self._model = None
             return
             
         # Check if credentials are configured
         if not self.settings.watsonx_api_key or not self.settings.watsonx_project_id:
-            print("ℹ️  watsonx.ai credentials not configured")
-            print("   Using mock AI responses instead")
+            logger.info("ℹ️  watsonx.ai credentials not configured. Using mock AI responses instead")
             self._model = None
             return
         
@@ -93,15 +262,268 @@ class WatsonXService:
                 project_id=self.settings.watsonx_project_id,
             )
             
-            print(f"✓ watsonx.ai initialized: {self.MODEL_ID}")
+            logger.info("✓ watsonx.ai initialized: %s", self.MODEL_ID)
         except Exception as e:
-            print(f"✗ Failed to initialize watsonx.ai: {e}")
-            print("   Using mock AI responses instead")
+            logger.exception("✗ Failed to initialize watsonx.ai. Using mock AI responses instead")
+            self._model = None
+
+    def _initialize_http_model(self):
+        """Initialize the direct REST client (WATSONX_HTTP_CLIENT=true; does not need the SDK)"""
+        if not self.settings.watsonx_api_key or not self.settings.watsonx_project_id:
+            logger.info("ℹ️  watsonx.ai credentials not configured. Using mock AI responses instead")
+            self._model = None
+            return
+        
+        try:
+            self._model = WatsonxHTTPModel(
+                model_id=self.MODEL_ID,
+                url=self.settings.watsonx_url,
+                api_key=self.settings.watsonx_api_key,
+                project_id=self.settings.watsonx_project_id,
+                params=self.GENERATION_PARAMS,
+            )
+            logger.info("✓ watsonx.ai REST client initialized: %s", self.MODEL_ID)
+        except Exception as e:
+            logger.exception("✗ Failed to initialize watsonx.ai REST client. Using mock AI responses instead")
             self._model = None
 
     def is_available(self) -> bool:
         """Check if watsonx.ai is available"""
-        return self._model is not None
+        return self._available
+
+    def _generate_text(self, prompt: str, similar_key: Optional[str] = None) -> tuple[str, bool, int]:
+        """
+        Generate text for a prompt, reusing a cached response when available
+
+        Args:
+            prompt: Fully built prompt
+            similar_key: Optional near-duplicate cache key (see _similarity_key)
+
+        Returns:
+            (response, cache_hit, retries) tuple
+        """
+        cached, key = self._cache_lookup(prompt, similar_key)
+        if cached is not None:
+            return cached, True, 0
+
+        response, retries = self._call_model(prompt)
+        self._cache_store(key, similar_key, response)
+        return response, False, retries
+
+    async def _agenerate_text(self, prompt: str, similar_key: Optional[str] = None) -> tuple[str, bool, int]:
+        """
+        Async variant of _generate_text with bounded concurrency
+
+        The blocking SDK call runs in a worker thread so the event loop stays free.
+        With watsonx_batch_window_ms set, requests are coalesced into batched calls
+        instead (see _abatch_call).
+
+        Args:
+            prompt: Fully built prompt
+            similar_key: Optional near-duplicate cache key (see _similarity_key)
+
+        Returns:
+            (response, cache_hit, retries) tuple
+        """
+        cached, key = self._cache_lookup(prompt, similar_key)
+        if cached is not None:
+            return cached, True, 0
+
+        if self._batcher is not None:
+            response, retries = await self._abatch_call(prompt)
+        else:
+            async with self._semaphore:
+                response, retries = await self._acall_model(prompt)
+        self._cache_store(key, similar_key, response)
+        return response, False, retries
+
+    def _estimate_tokens(self, prompt: str, output: str) -> int:
+        """
+        Estimate tokens billed for a prompt and its generated output
+
+        Uses the tokenizer when accurate_token_count is set; otherwise a cheap
+        approximation of ~3 characters per token (without joining the strings).
+        Prompt counts are memoized; outputs are counted once, so they are not.
+        """
+        if self.settings.accurate_token_count:
+            return (
+                self.prompt_builder.count_tokens(prompt)
+                + self.prompt_builder.count_tokens(output, cache=False)
+            )
+        return (len(prompt) + len(output)) // 3
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Backoff before retry number attempt + 1 (0.5s, 1.5s, 4.5s, ...)"""
+        return 0.5 * 3 ** attempt
+
+    def _start_call(self, prompt: str) -> _ModelCall:
+        """Start one model call; it runs once a concurrency slot is free"""
+        return _ModelCall(self._call_slots, lambda: self._model.generate_text(prompt=prompt))
+
+    def _abandon_call(self, prompt: str, call: _ModelCall):
+        """
+        Give up on a timed-out call: free its slot now, and track its tokens once it
+        finishes (watsonx.ai bills it regardless)
+        """
+        def track(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                self._track_abandoned(prompt, done.result())
+
+        call.abandon_slot()
+        call.result.add_done_callback(track)
+        self._track_executor.submit(self.token_tracker.record_timeout)
+        logger.warning(
+            "⚠️ watsonx.ai request timed out after %ss", self.settings.request_timeout_s,
+        )
+
+    def _track_abandoned(self, prompt: str, response: str):
+        """Track the estimated tokens of a response nobody waited for"""
+        self._track_executor.submit(
+            self.token_tracker.track_request,
+            tokens_used=self._estimate_tokens(prompt, response),
+            model=self.MODEL_ID,
+            endpoint="(timed out)",
+        )
+
+    def _call_model(self, prompt: str) -> tuple[str, int]:
+        """
+        Call the model, retrying with backoff if a request exceeds request_timeout_s
+
+        The timeout starts once the call is running (waiting for a concurrency slot
+        does not count against it).
+
+        Returns:
+            (response, retries) tuple
+
+        Raises:
+            TimeoutError: If every attempt timed out
+        """
+        for attempt in range(self.settings.max_retries + 1):
+            call = self._start_call(prompt)
+            call.started.result()
+            try:
+                return call.result.result(timeout=self.settings.request_timeout_s), attempt
+            except FutureTimeoutError:
+                self._abandon_call(prompt, call)
+            if attempt < self.settings.max_retries:
+                time.sleep(self._retry_delay(attempt))
+        raise TimeoutError(f"watsonx.ai request timed out after {self.settings.max_retries + 1} attempts")
+
+    async def _acall_model(self, prompt: str) -> tuple[str, int]:
+        """Async variant of _call_model (shares the same model call slots)"""
+        for attempt in range(self.settings.max_retries + 1):
+            call = self._start_call(prompt)
+            # Cancelling the caller while it waits for a slot cancels the call before it runs
+            await asyncio.wrap_future(call.started)
+            try:
+                # shield: a timeout abandons the call instead of cancelling its future
+                response = await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(call.result)),
+                    timeout=self.settings.request_timeout_s,
+                )
+                return response, attempt
+            except asyncio.TimeoutError:
+                self._abandon_call(prompt, call)
+                if attempt < self.settings.max_retries:
+                    await asyncio.sleep(self._retry_delay(attempt))
+        raise TimeoutError(f"watsonx.ai request timed out after {self.settings.max_retries + 1} attempts")
+
+    async def _abatch_call(self, prompt: str) -> tuple[str, int]:
+        """
+        Generate through the micro-batcher (timed out requests are not retried,
+        since the batch they belong to is still running; its tokens are tracked
+        when it finishes, and a request still queued is dropped from the batch)
+
+        Returns:
+            (response, retries) tuple
+
+        Raises:
+            TimeoutError: If the batch did not finish within request_timeout_s
+        """
+        try:
+            response = await asyncio.wait_for(
+                self._batcher.submit(prompt),
+                timeout=self.settings.request_timeout_s,
+            )
+            return response, 0
+        except asyncio.TimeoutError:
+            self._track_executor.submit(self.token_tracker.record_timeout)
+            logger.warning("⚠️ watsonx.ai batched request timed out after %ss", self.settings.request_timeout_s)
+            raise TimeoutError(f"watsonx.ai request timed out after {self.settings.request_timeout_s}s")
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Generate responses for several prompts in one SDK call (in order)"""
+        with self._call_slots:
+            return self._model.generate_text(prompt=prompts)
+
+    def _cache_lookup(self, prompt: str, similar_key: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached response by exact prompt, then by near-duplicate key
+
+        Returns:
+            (cached_response, exact_key) tuple; exact_key is None when caching is disabled
+        """
+        if not self.settings.enable_response_cache:
+            return None, None
+
+        key = self.response_cache.make_key(prompt, self.MODEL_ID)
+        cached = self.response_cache.get(key)
+        if cached is None and similar_key is not None:
+            cached = self.similar_cache.get(similar_key)
+        return cached, key
+
+    def _cache_store(self, key: Optional[str], similar_key: Optional[str], response: str):
+        """Store a fresh response under its exact and near-duplicate keys"""
+        if key is None:
+            return
+        self.response_cache.set(key, response)
+        if similar_key is not None:
+            self.similar_cache.set(similar_key, response)
+
+    def clear_cache(self):
+        """Drop all cached responses (exact and near-duplicate)"""
+        self.response_cache.clear()
+        self.similar_cache.clear()
+
+    def _similarity_key(
+        self,
+        endpoint: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+        context: str = "",
+    ) -> Optional[str]:
+        """
+        Build a near-duplicate cache key for an explanation or compliance request
+
+        Drops the customer name and buckets amount (log-scale, ~25% wide bins) and
+        risk score (0.1 wide, within the same risk level), so structurally similar
+        transactions share a response. Any extra prompt context (e.g. retrieved
+        compliance documents) must match exactly.
+
+        Args:
+            endpoint: Endpoint the response is for (responses are never shared across endpoints)
+            context: Extra prompt context that must match exactly
+
+        Returns:
+            Cache key, or None if near-duplicate caching is disabled
+        """
+        if not self.settings.enable_similar_response_cache:
+            return None
+
+        amount_bin = round(math.log10(amount) * 10) if amount > 0 else 0
+        features = (
+            endpoint,
+            country,
+            amount_bin,
+            int(risk_score * 10),
+            self._calculate_risk_level(risk_score),
+            account_age_days,
+            transaction_count_30d,
+        )
+        return self.similar_cache.make_key(f"{features!r}|{context}", self.MODEL_ID)
     
     def _clean_response(self, response: str) -> str:
         """
@@ -113,39 +535,21 @@ class WatsonXService:
         Returns:
             Cleaned response text
         """
-        # Remove prompt echo if present (case-insensitive)
-        prompt_markers = [
-            "Prompt:",
-            "\n\nPrompt:",
-            "Prompt 2:",
-            "\n\nPrompt 2:",
-            "Example:",
-            "\n\nExample:",
-            "Another example:",
-            "Analyze this banking transaction",
-        ]
-        
-        for marker in prompt_markers:
-            if marker in response:
-                # Split and keep only the first part
-                response = response.split(marker)[0].strip()
+        # Cut at the first prompt echo / hallucinated example, if any
+        match = _PROMPT_CUT_RE.search(response)
+        if match:
+            response = response[:match.start()].strip()
         
         # Remove common AI meta-text
-        meta_patterns = [
-            "Here is the analysis:",
-            "Here's the analysis:",
-            "Analysis:",
-        ]
-        for pattern in meta_patterns:
-            if response.startswith(pattern):
-                response = response[len(pattern):].strip()
+        prefix_end = _META_PREFIX_RE.match(response).end()
+        if prefix_end:
+            response = response[prefix_end:].strip()
         
         # Remove incomplete numbered list items (e.g., "3." with no content)
-        import re
         # Remove lines that are just a number followed by period and whitespace/newline
-        response = re.sub(r'\n\d+\.\s*\n', '\n', response)
+        response = _EMPTY_ITEM_RE.sub('\n', response)
         # Also remove if it's at the end
-        response = re.sub(r'\n\d+\.\s*$', '', response)
+        response = _TRAILING_NUM_RE.sub('', response)
         
         return response.strip()
 
@@ -174,19 +578,13 @@ class WatsonXService:
             - confidence: Model confidence (0.0-1.0)
             - tokens_consumed: Number of tokens used
             - generation_time_ms: Generation time in milliseconds
+            - cache_hit: Whether the response was served from cache
+            - retries: Number of retries after request timeouts
 
         Raises:
             Exception: If watsonx.ai is unavailable or request fails
         """
-        if not self.is_available():
-            raise Exception("watsonx.ai service is not available")
-
-        # Check budget before making request
-        if not self.token_tracker.is_within_budget(estimated_tokens=500):
-            raise Exception("Token budget exceeded")
-
-        # Build prompt
-        prompt = self.prompt_builder.build_explanation_prompt(
+        prompt = self._prepare_explanation_prompt(
             customer_name=customer_name,
             amount=amount,
             country=country,
@@ -195,36 +593,403 @@ class WatsonXService:
             transaction_count_30d=transaction_count_30d,
         )
 
+        similar_key = self._similarity_key(
+            "/explain", amount, country, risk_score, account_age_days, transaction_count_30d
+        )
+
         # Generate response
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            response = self._model.generate_text(prompt=prompt)
+            response, cache_hit, retries = self._generate_text(prompt, similar_key)
             
-            generation_time_ms = int((time.time() - start_time) * 1000)
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
-            # Debug: Print raw response
-            print(f"\n{'='*60}")
-            print("RAW AI RESPONSE (Explanation):")
-            print(f"{'='*60}")
-            print(response)
-            print(f"{'='*60}\n")
+            return self._build_explanation_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, risk_score,
+            )
             
-            # Clean and parse response
-            explanation_text = self._clean_response(response)
+        except Exception as e:
+            logger.exception("✗ watsonx.ai generation failed")
+            raise Exception(f"AI generation failed: {str(e)}")
+
+    async def generate_explanation_async(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_explanation (same arguments and result)
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt = self._prepare_explanation_prompt(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            risk_score=risk_score,
+            account_age_days=account_age_days,
+            transaction_count_30d=transaction_count_30d,
+        )
+
+        similar_key = self._similarity_key(
+            "/explain", amount, country, risk_score, account_age_days, transaction_count_30d
+        )
+
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = await self._agenerate_text(prompt, similar_key)
             
-            # Debug: Print cleaned response
-            print(f"\n{'='*60}")
-            print("CLEANED RESPONSE (Explanation):")
-            print(f"{'='*60}")
-            print(explanation_text)
-            print(f"{'='*60}\n")
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
-            # Estimate tokens (rough approximation: 1 token ≈ 4 characters)
-            tokens_consumed = len(prompt + explanation_text) // 4
+            return self._build_explanation_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, risk_score,
+            )
             
-            # Track usage
-            self.token_tracker.track_request(
+        except Exception as e:
+            logger.exception("✗ watsonx.ai generation failed")
+            raise Exception(f"AI generation failed: {str(e)}")
+
+    def generate_explanation_stream(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a risk explanation as it is generated (for StreamingResponse)
+
+        Availability and budget are checked before the stream is returned. Chunks are
+        model output cut at any prompt echo; use generate_explanation for parsed sections.
+
+        Returns:
+            Async iterator of text chunks
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or the budget is exceeded
+        """
+        prompt = self._prepare_explanation_prompt(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            risk_score=risk_score,
+            account_age_days=account_age_days,
+            transaction_count_30d=transaction_count_30d,
+        )
+        return self._stream_explanation(prompt, customer_name, amount, risk_score)
+
+    async def _stream_explanation(
+        self,
+        prompt: str,
+        customer_name: str,
+        amount: float,
+        risk_score: float,
+    ) -> AsyncIterator[str]:
+        """
+        Yield explanation chunks, then cache the full text and track usage
+
+        Output is cut at the first prompt echo (see _clean_response) and generation
+        stops there. The last few characters are held back until it is clear they do
+        not start a marker. Each chunk must arrive within request_timeout_s.
+        """
+        start_ns = time.perf_counter_ns()
+        cached, key = self._cache_lookup(prompt, None)
+        cache_hit = cached is not None
+        parts: List[str] = []
+        pending = ""
+        stop: Optional[threading.Event] = None
+        
+        try:
+            if cache_hit:
+                match = _PROMPT_CUT_RE.search(cached)
+                parts.append(cached[:match.start()] if match else cached)
+                yield parts[-1]
+            else:
+                async with self._semaphore:
+                    chunks, stop, started = self._start_stream(prompt)
+                    await started.wait()  # Chunk timeouts start once the stream holds a call slot
+                    while True:
+                        try:
+                            part = await asyncio.wait_for(
+                                chunks.get(), timeout=self.settings.request_timeout_s
+                            )
+                        except asyncio.TimeoutError:
+                            self._track_executor.submit(self.token_tracker.record_timeout)
+                            logger.warning(
+                                "⚠️ watsonx.ai stream stalled for %ss", self.settings.request_timeout_s
+                            )
+                            raise TimeoutError(
+                                f"watsonx.ai stream timed out after {self.settings.request_timeout_s}s"
+                            )
+                        if isinstance(part, Exception):
+                            raise part
+                        if part is None:
+                            break
+                        pending += part
+                        match = _PROMPT_CUT_RE.search(pending)
+                        if match:
+                            pending = pending[:match.start()]
+                            break
+                        safe = len(pending) - _PROMPT_CUT_MAX_LEN + 1
+                        if safe > 0:
+                            parts.append(pending[:safe])
+                            pending = pending[safe:]
+                            yield parts[-1]
+                if pending:
+                    parts.append(pending)
+                    pending = ""
+                    yield parts[-1]
+                self._cache_store(key, None, "".join(parts))
+        finally:
+            # Release the model stream (and its HTTP connection) on early exit or disconnect
+            if stop is not None:
+                stop.set()
+            # Track usage even if the client disconnected mid-stream
+            if parts:
+                generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+                self._build_explanation_result(
+                    prompt, "".join(parts), cache_hit, 0, generation_time_ms,
+                    customer_name, amount, risk_score,
+                )
+
+    def _start_stream(self, prompt: str) -> Tuple[asyncio.Queue, threading.Event, asyncio.Event]:
+        """
+        Read a model stream on its own daemon thread, holding a model call slot
+
+        Chunks are handed to the event loop through the returned queue, followed by
+        None at the end (or the exception that ended the stream). Setting the returned
+        threading.Event stops reading; the thread then closes the stream, releasing its
+        connection. The returned asyncio.Event is set once the stream holds a slot.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        started = asyncio.Event()
+
+        def emit(item: Any):
+            try:
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:  # Event loop already closed
+                pass
+
+        def run():
+            with self._call_slots:
+                try:
+                    loop.call_soon_threadsafe(started.set)
+                except RuntimeError:  # Event loop already closed
+                    return
+                if not stop.is_set():
+                    read()
+
+        def read():
+            stream = None
+            try:
+                stream = self._model.generate_text_stream(prompt=prompt)
+                for part in stream:
+                    if stop.is_set():
+                        break
+                    emit(part)
+            except Exception as e:
+                emit(e)
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+                emit(None)
+
+        threading.Thread(target=run, name="watsonx-stream", daemon=True).start()
+        return chunks, stop, started
+
+    async def generate_explanations_batch(
+        self,
+        cases: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate explanations for several cases concurrently
+
+        Args:
+            cases: Dicts of generate_explanation keyword arguments
+
+        Returns:
+            Explanation results, in the same order as cases
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or any request fails
+        """
+        return await asyncio.gather(
+            *(self.generate_explanation_async(**case) for case in cases)
+        )
+
+    def generate_explanations_bulk(
+        self,
+        cases: List[Dict[str, Any]],
+        max_concurrency: int = 10,
+        rate_limit_rpm: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate explanations for many cases from synchronous code (scripts, bulk jobs)
+
+        Availability and budget are checked once for the whole batch, model calls run
+        on a bounded thread pool, and token usage is recorded with a single batch write.
+
+        Args:
+            cases: Dicts of generate_explanation keyword arguments
+            max_concurrency: Maximum concurrent model calls
+            rate_limit_rpm: Optional cap on model requests started per minute
+            on_progress: Optional callback invoked as on_progress(done, total)
+
+        Returns:
+            Explanation results, in the same order as cases
+
+        Raises:
+            Exception: If watsonx.ai is unavailable, the batch exceeds the budget,
+                or any request fails (calls not yet started are cancelled; calls that
+                completed are still tracked, as watsonx.ai bills them)
+        """
+        if not self._available:
+            raise Exception("watsonx.ai service is not available")
+
+        if not self.token_tracker.is_within_budget(estimated_tokens=500 * len(cases)):
+            raise Exception("Token budget exceeded")
+
+        prompts = [self.prompt_builder.build_explanation_prompt(**case) for case in cases]
+
+        # Space request starts evenly when a rate limit is set
+        interval = 60.0 / rate_limit_rpm if rate_limit_rpm else 0.0
+        schedule_lock = threading.Lock()
+        next_start = [time.monotonic()]
+
+        def generate(prompt: str) -> tuple[str, bool, int, int]:
+            if interval:
+                with schedule_lock:
+                    start_at = max(next_start[0], time.monotonic())
+                    next_start[0] = start_at + interval
+                time.sleep(max(0.0, start_at - time.monotonic()))
+            start_ns = time.perf_counter_ns()
+            response, cache_hit, retries = self._generate_text(prompt)
+            return response, cache_hit, retries, (time.perf_counter_ns() - start_ns) // 1_000_000
+
+        outputs: List[Optional[tuple]] = [None] * len(cases)
+        error: Optional[Exception] = None
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="watsonx-bulk") as pool:
+            futures = {pool.submit(generate, prompt): i for i, prompt in enumerate(prompts)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    outputs[futures[future]] = future.result()
+                except CancelledError:
+                    continue
+                except Exception as e:
+                    if error is None:
+                        error = e
+                        # Stop queued calls; calls already running finish and are tracked below
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                if on_progress and error is None:
+                    on_progress(done, len(cases))
+
+        completed = [
+            (case, prompt, output)
+            for case, prompt, output in zip(cases, prompts, outputs)
+            if output is not None
+        ]
+        results = []
+        for case, prompt, (response, cache_hit, retries, generation_time_ms) in completed:
+            results.append(self._build_explanation_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                case["customer_name"], case["amount"], case["risk_score"],
+                track=False,
+            ))
+
+        # One log write for the whole batch (including completed calls of a failed batch)
+        records = [
+            {
+                "tokens_used": result["tokens_consumed"],
+                "model": self.MODEL_ID,
+                "endpoint": "/explain",
+                "metadata": {
+                    "customer": case["customer_name"],
+                    "amount": case["amount"],
+                    "risk_score": case["risk_score"],
+                },
+                "cache_hit": result["cache_hit"],
+            }
+            for (case, _, _), result in zip(completed, results)
+        ]
+        if records:
+            self._track_executor.submit(self.token_tracker.track_requests, records)
+
+        if error is not None:
+            logger.error("✗ watsonx.ai bulk generation failed: %s", error, exc_info=error)
+            raise Exception(f"AI generation failed: {str(error)}")
+        return results
+
+    def _prepare_explanation_prompt(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+    ) -> str:
+        """Check availability and budget, then build the explanation prompt"""
+        if not self._available:
+            raise Exception("watsonx.ai service is not available")
+
+        # Check budget before making request
+        if not self.token_tracker.is_within_budget(estimated_tokens=500):
+            raise Exception("Token budget exceeded")
+
+        return self.prompt_builder.build_explanation_prompt(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            risk_score=risk_score,
+            account_age_days=account_age_days,
+            transaction_count_30d=transaction_count_30d,
+        )
+
+    def _build_explanation_result(
+        self,
+        prompt: str,
+        response: str,
+        cache_hit: bool,
+        retries: int,
+        generation_time_ms: int,
+        customer_name: str,
+        amount: float,
+        risk_score: float,
+        track: bool = True,
+    ) -> Dict[str, Any]:
+        """Clean and parse an explanation response, and track its usage (unless track is False)"""
+        logger.debug("Raw AI response (explanation):\n%s", response)
+        
+        # Clean and parse response
+        explanation_text = self._clean_response(response)
+        
+        logger.debug("Cleaned AI response (explanation):\n%s", explanation_text)
+        
+        # Estimate tokens
+        tokens_consumed = 0 if cache_hit else self._estimate_tokens(prompt, explanation_text)
+        
+        # Track usage
+        if track:
+            self._track_executor.submit(
+                self.token_tracker.track_request,
                 tokens_used=tokens_consumed,
                 model=self.MODEL_ID,
                 endpoint="/explain",
@@ -233,25 +998,24 @@ class WatsonXService:
                     "amount": amount,
                     "risk_score": risk_score,
                 },
+                cache_hit=cache_hit,
             )
-            
-            # Parse explanation into sections
-            rationale, recommended_action = self._parse_explanation(explanation_text)
-            
-            # Estimate confidence based on risk score and response
-            confidence = self._estimate_confidence(risk_score, explanation_text)
-            
-            return {
-                "rationale": rationale,
-                "recommended_action": recommended_action,
-                "confidence": confidence,
-                "tokens_consumed": tokens_consumed,
-                "generation_time_ms": generation_time_ms,
-            }
-            
-        except Exception as e:
-            print(f"✗ watsonx.ai generation failed: {e}")
-            raise Exception(f"AI generation failed: {str(e)}")
+        
+        # Parse explanation into sections
+        rationale, recommended_action = self._parse_explanation(explanation_text)
+        
+        # Estimate confidence based on risk score and response
+        confidence = self._estimate_confidence(risk_score, explanation_text)
+        
+        return {
+            "rationale": rationale,
+            "recommended_action": recommended_action,
+            "confidence": confidence,
+            "tokens_consumed": tokens_consumed,
+            "generation_time_ms": generation_time_ms,
+            "cache_hit": cache_hit,
+            "retries": retries,
+        }
 
     def generate_risk_score(
         self,
@@ -276,139 +1040,314 @@ class WatsonXService:
             - risk_level: LOW/MEDIUM/HIGH
             - tokens_consumed: Number of tokens used
             - generation_time_ms: Generation time in milliseconds
+            - cache_hit: Whether the response was served from cache
+            - retries: Number of retries after request timeouts
+            
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt = self._prepare_risk_score_prompt(customer_name, amount, country, transaction_type)
+        
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = self._generate_text(prompt)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_risk_score_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ Risk score generation failed")
+            raise Exception(f"AI risk scoring failed: {str(e)}")
+
+    async def generate_risk_score_async(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        transaction_type: str = "wire transfer",
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_risk_score (same arguments and result)
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt = self._prepare_risk_score_prompt(customer_name, amount, country, transaction_type)
+        
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = await self._agenerate_text(prompt)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_risk_score_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ Risk score generation failed")
+            raise Exception(f"AI risk scoring failed: {str(e)}")
+
+    def _prepare_risk_score_prompt(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        transaction_type: str,
+    ) -> str:
+        """Check availability and budget, then build the risk scoring prompt"""
+        if not self._available:
+            raise Exception("watsonx.ai service is not available")
+        
+        # Check budget
+        if not self.token_tracker.is_within_budget(estimated_tokens=300):
+            raise Exception("Token budget exceeded")
+        
+        return self.prompt_builder.build_risk_scoring_prompt(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            transaction_type=transaction_type,
+        )
+
+    def _build_risk_score_result(
+        self,
+        prompt: str,
+        response: str,
+        cache_hit: bool,
+        retries: int,
+        generation_time_ms: int,
+        customer_name: str,
+        amount: float,
+        country: str,
+    ) -> Dict[str, Any]:
+        """Clean and parse a risk score response, and track its usage"""
+        # Clean and parse the response
+        cleaned_response = self._clean_response(response)
+        risk_score, reasoning, risk_level = self._parse_risk_score(cleaned_response)
+        
+        # Estimate tokens
+        tokens_consumed = 0 if cache_hit else self._estimate_tokens(prompt, response)
+        
+        # Track usage
+        self._track_executor.submit(
+            self.token_tracker.track_request,
+            tokens_used=tokens_consumed,
+            model=self.MODEL_ID,
+            endpoint="/calculate-risk",
+            metadata={
+                "customer_name": customer_name,
+                "amount": amount,
+                "country": country,
+            },
+            cache_hit=cache_hit,
+        )
+        
+        return {
+            "risk_score": risk_score,
+            "reasoning": reasoning,
+            "risk_level": risk_level,
+            "tokens_consumed": tokens_consumed,
+            "generation_time_ms": generation_time_ms,
+            "cache_hit": cache_hit,
+            "retries": retries,
+        }
+
+    def generate_risk_category(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        transaction_type: str = "wire transfer",
+    ) -> Dict[str, Any]:
+        """
+        Categorize risk type for a transaction using watsonx.ai
+
+        Args:
+            customer_name: Customer name
+            amount: Transaction amount in USD
+            country: Country code
+            transaction_type: Type of transaction
+
+        Returns:
+            Dictionary with:
+            - risk_category: Categorized risk type (e.g., Fraud, AML, Sanctions)
+            - tokens_consumed: Number of tokens used
+            - generation_time_ms: Generation time in milliseconds
+            - cache_hit: Whether the response was served from cache
+            - retries: Number of retries after request timeouts
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt = self._prepare_risk_category_prompt(customer_name, amount, country, transaction_type)
+
+        start_ns = time.perf_counter_ns()
+        try:
+            response, cache_hit, retries = self._generate_text(prompt)
             
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_risk_category_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ Risk score generation failed")
+            raise Exception(f"AI risk scoring failed: {str(e)}")
+
+    async def generate_risk_category_async(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        transaction_type: str = "wire transfer",
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_risk_category (same arguments and result)
+
         Raises:
             Exception: If watsonx.ai is unavailable or request fails
         """
-        if not self.is_available():
+        prompt = self._prepare_risk_category_prompt(customer_name, amount, country, transaction_type)
+
+        start_ns = time.perf_counter_ns()
+        try:
+            response, cache_hit, retries = await self._agenerate_text(prompt)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_risk_category_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ Risk score generation failed")
+            raise Exception(f"AI risk scoring failed: {str(e)}")
+
+    def _prepare_risk_category_prompt(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        transaction_type: str,
+    ) -> str:
+        """Check availability and budget, then build the risk category prompt"""
+        if not self._available:
             raise Exception("watsonx.ai service is not available")
         
         # Check budget
         if not self.token_tracker.is_within_budget(estimated_tokens=300):
             raise Exception("Token budget exceeded")
-        
-        # Build prompt
-        prompt = self.prompt_builder.build_risk_scoring_prompt(
-            customer_name=customer_name,
+
+        return self.prompt_builder.build_risk_category_prompt(
+            custoner_name=customer_name,
             amount=amount,
             country=country,
             transaction_type=transaction_type,
         )
+
+    def _build_risk_category_result(
+        self,
+        prompt: str,
+        response: str,
+        cache_hit: bool,
+        retries: int,
+        generation_time_ms: int,
+        customer_name: str,
+        amount: float,
+        country: str,
+    ) -> Dict[str, Any]:
+        """Clean and parse a risk category response, and track its usage"""
+        # Clean and parse the response
+        cleaned_response = self._clean_response(response)
+        risk_category, reasoning = self.parse_risk_category(cleaned_response)
         
-        # Generate response
-        start_time = time.time()
+        # Estimate tokens
+        tokens_consumed = 0 if cache_hit else self._estimate_tokens(prompt, response)
         
-        try:
-            response = self._model.generate_text(prompt=prompt)
-            
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            
-            # Clean and parse the response
-            cleaned_response = self._clean_response(response)
-            risk_score, reasoning, risk_level = self._parse_risk_score(cleaned_response)
-            
-            # Estimate tokens
-            tokens_consumed = len(prompt + response) // 4
-            
-            # Track usage
-            self.token_tracker.track_request(
-                tokens_used=tokens_consumed,
-                model=self.MODEL_ID,
-                endpoint="/calculate-risk",
-                metadata={
-                    "customer_name": customer_name,
-                    "amount": amount,
-                    "country": country,
-                },
-            )
-            
-            return {
-                "risk_score": risk_score,
-                "reasoning": reasoning,
-                "risk_level": risk_level,
-                "tokens_consumed": tokens_consumed,
-                "generation_time_ms": generation_time_ms,
-            }
-            
-        except Exception as e:
-            print(f"✗ Risk score generation failed: {e}")
-            raise Exception(f"AI risk scoring failed: {str(e)}")
+        # Track usage
+        self._track_executor.submit(
+            self.token_tracker.track_request,
+            tokens_used=tokens_consumed,
+            model=self.MODEL_ID,
+            endpoint="/calculate-risk",
+            metadata={
+                "customer_name": customer_name,
+                "amount": amount,
+                "country": country,
+            },
+            cache_hit=cache_hit,
+        )
+        
+        return {
+            "risk_category": risk_category,
+            "reasoning": reasoning,
+            "tokens_consumed": tokens_consumed,
+            "generation_time_ms": generation_time_ms,
+            "cache_hit": cache_hit,
+            "retries": retries,
+        }
 
-    def generate_risk_category(
+    def analyze_case(
         self,
         customer_name: str,
         amount: float,
         country: str,
+        risk_score: float,
         transaction_type: str = "wire transfer",
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
     ) -> Dict[str, Any]:
         """
-        Categorize risk type for a transaction using watsonx.ai
+        Generate a risk score, risk category, and explanation for one case concurrently
+
+        The three requests are independent, so they run in parallel and the total
+        latency is that of the slowest one. Model calls still share the service's
+        concurrency limit (watsonx_concurrency).
 
         Args:
             customer_name: Customer name
             amount: Transaction amount in USD
             country: Country code
+            risk_score: Current risk score (used for the explanation)
             transaction_type: Type of transaction
 
         Returns:
-            Dictionary with:
-            - risk_category: Categorized risk type (e.g., Fraud, AML, Sanctions)
-            - tokens_consumed: Number of tokens used
-            - generation_time_ms: Generation time in milliseconds
+            Dictionary with "risk_score", "risk_category" and "explanation" results
+            (see generate_risk_score, generate_risk_category, generate_explanation)
 
         Raises:
-            Exception: If watsonx.ai is unavailable or request fails
+            Exception: If watsonx.ai is unavailable or any request fails
         """
-        if not self.is_available():
+        if not self._available:
             raise Exception("watsonx.ai service is not available")
-        
-        # Check budget
-        if not self.token_tracker.is_within_budget(estimated_tokens=300):
-            raise Exception("Token budget exceeded")
-
-        # Build prompt
-        prompt = self.prompt_builder.build_risk_category_prompt(
-            custoner_name=customer_name,
-            amount=amount,
-            country=country,
-            transaction_type=transaction_type,
-        )
 
-        start_time = time.time()
-        try:
-            response = self._model.generate_text(prompt=prompt)
-            
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            
-            # Clean and parse the response
-            cleaned_response = self._clean_response(response)
-            risk_category, reasoning = self.parse_risk_category(cleaned_response)
-            
-            # Estimate tokens
-            tokens_consumed = len(prompt + response) // 4
-            
-            # Track usage
-            self.token_tracker.track_request(
-                tokens_used=tokens_consumed,
-                model=self.MODEL_ID,
-                endpoint="/calculate-risk",
-                metadata={
-                    "customer_name": customer_name,
-                    "amount": amount,
-                    "country": country,
-                },
-            )
-            
-            return {
-                "risk_category": risk_category,
-                "reasoning": reasoning,
-                "tokens_consumed": tokens_consumed,
-                "generation_time_ms": generation_time_ms,
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="watsonx-case") as pool:
+            futures = {
+                pool.submit(
+                    self.generate_risk_score, customer_name, amount, country, transaction_type
+                ): "risk_score",
+                pool.submit(
+                    self.generate_risk_category, customer_name, amount, country, transaction_type
+                ): "risk_category",
+                pool.submit(
+                    self.generate_explanation, customer_name, amount, country, risk_score,
+                    account_age_days, transaction_count_30d,
+                ): "explanation",
             }
-            
-        except Exception as e:
-            print(f"✗ Risk score generation failed: {e}")
-            raise Exception(f"AI risk scoring failed: {str(e)}")
+            return {futures[future]: future.result() for future in as_completed(futures)}
 
     def generate_report_summary(
         self,
@@ -435,19 +1374,87 @@ class WatsonXService:
             - summary: Executive summary text
             - tokens_consumed: Number of tokens used
             - generation_time_ms: Generation time in milliseconds
+            - cache_hit: Whether the response was served from cache
+            - retries: Number of retries after request timeouts
+
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt = self._prepare_report_summary_prompt(
+            total_cases, high_risk_count, medium_risk_count, low_risk_count, avg_risk, total_amount,
+        )
+
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = self._generate_text(prompt)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_report_summary_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                total_cases, high_risk_count,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ watsonx.ai generation failed")
+            raise Exception(f"AI generation failed: {str(e)}")
+    
+    async def generate_report_summary_async(
+        self,
+        total_cases: int,
+        high_risk_count: int,
+        medium_risk_count: int,
+        low_risk_count: int,
+        avg_risk: float,
+        total_amount: float,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_report_summary (same arguments and result)
 
         Raises:
             Exception: If watsonx.ai is unavailable or request fails
         """
-        if not self.is_available():
+        prompt = self._prepare_report_summary_prompt(
+            total_cases, high_risk_count, medium_risk_count, low_risk_count, avg_risk, total_amount,
+        )
+
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = await self._agenerate_text(prompt)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_report_summary_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                total_cases, high_risk_count,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ watsonx.ai generation failed")
+            raise Exception(f"AI generation failed: {str(e)}")
+    
+    def _prepare_report_summary_prompt(
+        self,
+        total_cases: int,
+        high_risk_count: int,
+        medium_risk_count: int,
+        low_risk_count: int,
+        avg_risk: float,
+        total_amount: float,
+    ) -> str:
+        """Check availability and budget, then build the report summary prompt"""
+        if not self._available:
             raise Exception("watsonx.ai service is not available")
 
         # Check budget
         if not self.token_tracker.is_within_budget(estimated_tokens=400):
             raise Exception("Token budget exceeded")
 
-        # Build prompt
-        prompt = self.prompt_builder.build_report_summary_prompt(
+        return self.prompt_builder.build_report_summary_prompt(
             total_cases=total_cases,
             high_risk_count=high_risk_count,
             medium_risk_count=medium_risk_count,
@@ -456,39 +1463,42 @@ class WatsonXService:
             total_amount=total_amount,
         )
 
-        # Generate response
-        start_time = time.time()
+    def _build_report_summary_result(
+        self,
+        prompt: str,
+        response: str,
+        cache_hit: bool,
+        retries: int,
+        generation_time_ms: int,
+        total_cases: int,
+        high_risk_count: int,
+    ) -> Dict[str, Any]:
+        """Clean a report summary response and track its usage"""
+        summary_text = response.strip()
         
-        try:
-            response = self._model.generate_text(prompt=prompt)
-            
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            
-            summary_text = response.strip()
-            
-            # Estimate tokens
-            tokens_consumed = len(prompt + summary_text) // 4
-            
-            # Track usage
-            self.token_tracker.track_request(
-                tokens_used=tokens_consumed,
-                model=self.MODEL_ID,
-                endpoint="/report",
-                metadata={
-                    "total_cases": total_cases,
-                    "high_risk_count": high_risk_count,
-                },
-            )
-            
-            return {
-                "summary": summary_text,
-                "tokens_consumed": tokens_consumed,
-                "generation_time_ms": generation_time_ms,
-            }
-            
-        except Exception as e:
-            print(f"✗ watsonx.ai generation failed: {e}")
-            raise Exception(f"AI generation failed: {str(e)}")
+        # Estimate tokens
+        tokens_consumed = 0 if cache_hit else self._estimate_tokens(prompt, summary_text)
+        
+        # Track usage
+        self._track_executor.submit(
+            self.token_tracker.track_request,
+            tokens_used=tokens_consumed,
+            model=self.MODEL_ID,
+            endpoint="/report",
+            metadata={
+                "total_cases": total_cases,
+                "high_risk_count": high_risk_count,
+            },
+            cache_hit=cache_hit,
+        )
+        
+        return {
+            "summary": summary_text,
+            "tokens_consumed": tokens_consumed,
+            "generation_time_ms": generation_time_ms,
+            "cache_hit": cache_hit,
+            "retries": retries,
+        }
     
     def parse_risk_category(self, text: str) -> tuple[str, str]:
         """
@@ -497,13 +1507,11 @@ class WatsonXService:
         Args:
             text: Raw AI response
         """
-        
-        import re
         # Extract risk category
-        category_match = re.search(r'RISK_CATEGORY:\s*(.+?)(?=REASONING:|$)', text, re.IGNORECASE | re.DOTALL)
+        category_match = _CATEGORY_RE.search(text)
         risk_category = category_match.group(1).strip() if category_match else "Uncategorized"
         # Extract reasoning
-        reasoning_match = re.search(r'REASONING:\s*(.+)', text, re.IGNORECASE | re.DOTALL)
+        reasoning_match = _CATEGORY_REASONING_RE.search(text)
         reasoning = reasoning_match.group(1).strip() if reasoning_match else "No reasoning provided."
         return risk_category, reasoning
 
@@ -537,11 +1545,84 @@ class WatsonXService:
             - confidence: Analysis confidence
             - tokens_consumed: Number of tokens used
             - generation_time_ms: Generation time in milliseconds
+            - cache_hit: Whether the response was served from cache
+            - retries: Number of retries after request timeouts
+            
+        Raises:
+            Exception: If watsonx.ai is unavailable or request fails
+        """
+        prompt, similar_key = self._prepare_compliance_prompt(
+            customer_name, amount, country, risk_score, document_context,
+            account_age_days, transaction_count_30d,
+        )
+        
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = self._generate_text(prompt, similar_key)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_compliance_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
             
+        except Exception as e:
+            logger.exception("✗ Compliance analysis failed")
+            raise Exception(f"AI compliance analysis failed: {str(e)}")
+    
+    async def analyze_compliance_with_rag_async(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        document_context: str,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of analyze_compliance_with_rag (same arguments and result)
+
         Raises:
             Exception: If watsonx.ai is unavailable or request fails
         """
-        if not self.is_available():
+        prompt, similar_key = self._prepare_compliance_prompt(
+            customer_name, amount, country, risk_score, document_context,
+            account_age_days, transaction_count_30d,
+        )
+        
+        # Generate response
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            response, cache_hit, retries = await self._agenerate_text(prompt, similar_key)
+            
+            generation_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            return self._build_compliance_result(
+                prompt, response, cache_hit, retries, generation_time_ms,
+                customer_name, amount, country,
+            )
+            
+        except Exception as e:
+            logger.exception("✗ Compliance analysis failed")
+            raise Exception(f"AI compliance analysis failed: {str(e)}")
+    
+    def _prepare_compliance_prompt(
+        self,
+        customer_name: str,
+        amount: float,
+        country: str,
+        risk_score: float,
+        document_context: str,
+        account_age_days: int = None,
+        transaction_count_30d: int = None,
+    ) -> tuple[str, str]:
+        """Check availability and budget, then build the RAG prompt and its similarity key"""
+        if not self._available:
             raise Exception("watsonx.ai service is not available")
         
         # Check budget
@@ -559,42 +1640,52 @@ class WatsonXService:
             transaction_count_30d=transaction_count_30d,
         )
         
-        # Generate response
-        start_time = time.time()
+        similar_key = self._similarity_key(
+            "/analyze-compliance", amount, country, risk_score,
+            account_age_days, transaction_count_30d, context=document_context,
+        )
+        return prompt, similar_key
+
+    def _build_compliance_result(
+        self,
+        prompt: str,
+        response: str,
+        cache_hit: bool,
+        retries: int,
+        generation_time_ms: int,
+        customer_name: str,
+        amount: float,
+        country: str,
+    ) -> Dict[str, Any]:
+        """Clean and parse a compliance analysis response, and track its usage"""
+        # Clean and parse the response
+        cleaned_response = self._clean_response(response)
+        parsed = self._parse_compliance_analysis(cleaned_response)
         
-        try:
-            response = self._model.generate_text(prompt=prompt)
-            
-            generation_time_ms = int((time.time() - start_time) * 1000)
-            
-            # Clean and parse the response
-            cleaned_response = self._clean_response(response)
-            parsed = self._parse_compliance_analysis(cleaned_response)
-            
-            # Estimate tokens
-            tokens_consumed = len(prompt + response) // 4
-            
-            # Track usage
-            self.token_tracker.track_request(
-                tokens_used=tokens_consumed,
-                model=self.MODEL_ID,
-                endpoint="/analyze-compliance",
-                metadata={
-                    "customer_name": customer_name,
-                    "amount": amount,
-                    "country": country,
-                },
-            )
-            
-            return {
-                **parsed,
-                "tokens_consumed": tokens_consumed,
-                "generation_time_ms": generation_time_ms,
-            }
-            
-        except Exception as e:
-            print(f"✗ Compliance analysis failed: {e}")
-            raise Exception(f"AI compliance analysis failed: {str(e)}")
+        # Estimate tokens
+        tokens_consumed = 0 if cache_hit else self._estimate_tokens(prompt, response)
+        
+        # Track usage
+        self._track_executor.submit(
+            self.token_tracker.track_request,
+            tokens_used=tokens_consumed,
+            model=self.MODEL_ID,
+            endpoint="/analyze-compliance",
+            metadata={
+                "customer_name": customer_name,
+                "amount": amount,
+                "country": country,
+            },
+            cache_hit=cache_hit,
+        )
+        
+        return {
+            **parsed,
+            "tokens_consumed": tokens_consumed,
+            "generation_time_ms": generation_time_ms,
+            "cache_hit": cache_hit,
+            "retries": retries,
+        }
     
     def _build_compliance_rag_prompt(
         self,
@@ -608,97 +1699,60 @@ class WatsonXService:
     ) -> str:
         """Build RAG prompt for compliance analysis."""
         # Build AML indicators section
-        aml_indicators = ""
+        indicator_lines = []
         if account_age_days is not None:
-            aml_indicators += f"\nAccount Age: {account_age_days} days"
+            indicator_lines.append(f"\nAccount Age: {account_age_days} days")
         if transaction_count_30d is not None:
-            aml_indicators += f"\nTransaction Velocity: {transaction_count_30d} large transactions in past 30 days"
+            indicator_lines.append(f"\nTransaction Velocity: {transaction_count_30d} large transactions in past 30 days")
+        aml_indicators = "".join(indicator_lines)
         
-        prompt = f"""You are a compliance analyst reviewing a banking transaction. Use the provided compliance documents to determine if this transaction violates any regulations.
-
-=== COMPLIANCE DOCUMENTS ===
-{document_context}
-
-=== TRANSACTION TO ANALYZE ===
-Customer: {customer_name}
-Amount: ${amount:,.2f} USD
-Country: {country}
-Current Risk Score: {risk_score:.2f} (0.0 = low risk, 1.0 = high risk){aml_indicators}
-
-=== INSTRUCTIONS ===
-Based on the compliance documents above, analyze this transaction and provide your assessment in EXACTLY this format:
-
-COMPLIANCE_STATUS: [COMPLIANT/NON_COMPLIANT/REVIEW_REQUIRED]
-VIOLATIONS: [List any potential violations, one per line, or "None" if compliant]
-RELEVANT_REGULATIONS: [List applicable regulations from the documents, one per line]
-RECOMMENDATION: [Your specific recommendation for this transaction]
-CONFIDENCE: [number between 0.0 and 1.0 indicating your confidence in this analysis]
-
-Example:
-COMPLIANCE_STATUS: REVIEW_REQUIRED
-VIOLATIONS: Transaction exceeds $10,000 threshold requiring enhanced due diligence
-RELEVANT_REGULATIONS: AML Policy - Enhanced Due Diligence requirement; KYC Guidelines - Risk-Based Approach
-RECOMMENDATION: Conduct enhanced due diligence before processing. Verify source of funds and beneficial ownership.
-CONFIDENCE: 0.85"""
-
-        return prompt
+        # Documents first: the prefix up to the transaction block is identical for every
+        # transaction checked against the same documents (provider prefix caching)
+        transaction_block = PromptBuilder.COMPLIANCE_TRANSACTION_TEMPLATE.format(
+            customer_name=customer_name,
+            amount=amount,
+            country=country,
+            risk_score=risk_score,
+            aml_indicators=aml_indicators,
+        )
+        documents_block = PromptBuilder.COMPLIANCE_DOCUMENTS_TEMPLATE.format(document_context=document_context)
+        return documents_block + transaction_block
     
     def _parse_compliance_analysis(self, text: str) -> Dict[str, Any]:
         """Parse compliance analysis response from AI."""
-        import re
-        
-        # Extract compliance status
-        status_match = re.search(
-            r'COMPLIANCE_STATUS:\s*(COMPLIANT|NON_COMPLIANT|REVIEW_REQUIRED)',
-            text,
-            re.IGNORECASE
-        )
-        compliance_status = status_match.group(1).upper() if status_match else "REVIEW_REQUIRED"
-        
-        # Extract violations
-        violations_match = re.search(
-            r'VIOLATIONS:\s*(.+?)(?=RELEVANT_REGULATIONS:|$)',
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
-        violations_text = violations_match.group(1).strip() if violations_match else "None identified"
+        match = _COMPLIANCE_RE.search(text)
+        if match:
+            compliance_status = match["status"].upper()
+            violations_text = match["violations"].strip()
+            regulations_text = match["regulations"].strip()
+            recommendation = match["recommendation"].strip()
+            confidence = float(match["confidence"])
+        else:
+            # Fields missing or out of order: search each one separately
+            status_match = _COMPLIANCE_STATUS_RE.search(text)
+            compliance_status = status_match.group(1).upper() if status_match else "REVIEW_REQUIRED"
+            
+            violations_match = _VIOLATIONS_RE.search(text)
+            violations_text = violations_match.group(1).strip() if violations_match else "None identified"
+            
+            regulations_match = _REGULATIONS_RE.search(text)
+            regulations_text = regulations_match.group(1).strip() if regulations_match else ""
+            
+            recommendation_match = _RECOMMENDATION_RE.search(text)
+            recommendation = recommendation_match.group(1).strip() if recommendation_match else "Manual review recommended"
+            
+            confidence_match = _CONFIDENCE_RE.search(text)
+            confidence = float(confidence_match.group(1)) if confidence_match else 0.7
         
         # Parse violations list
         violations = []
-        if violations_text.lower() != "none" and "none" not in violations_text.lower():
+        if "none" not in violations_text.lower():
             # Split by newlines or semicolons
-            violations = [
-                v.strip("- •").strip()
-                for v in re.split(r'[;\n]', violations_text)
-                if v.strip() and v.strip() != "None"
-            ]
-        
-        # Extract regulations
-        regulations_match = re.search(
-            r'RELEVANT_REGULATIONS:\s*(.+?)(?=RECOMMENDATION:|$)',
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
-        regulations_text = regulations_match.group(1).strip() if regulations_match else ""
+            violations = _split_bullets(violations_text)
         
         # Parse regulations list
-        relevant_regulations = [
-            r.strip("- •").strip()
-            for r in re.split(r'[;\n]', regulations_text)
-            if r.strip()
-        ]
-        
-        # Extract recommendation
-        recommendation_match = re.search(
-            r'RECOMMENDATION:\s*(.+?)(?=CONFIDENCE:|$)',
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
-        recommendation = recommendation_match.group(1).strip() if recommendation_match else "Manual review recommended"
+        relevant_regulations = _split_bullets(regulations_text)
         
-        # Extract confidence
-        confidence_match = re.search(r'CONFIDENCE:\s*(0?\.\d+|1\.0|0|1)', text, re.IGNORECASE)
-        confidence = float(confidence_match.group(1)) if confidence_match else 0.7
         confidence = max(0.0, min(1.0, confidence))
         
         return {
@@ -719,33 +1773,35 @@ CONFIDENCE: 0.85"""
         Returns:
             (risk_score, reasoning, risk_level) tuple
         """
-        import re
-        
-        # Extract risk score
-        score_match = re.search(r'RISK_SCORE:\s*(0?\.\d+|1\.0|0|1)', text, re.IGNORECASE)
-        risk_score = float(score_match.group(1)) if score_match else 0.5
+        match = _RISK_RE.search(text)
+        if match:
+            risk_score = float(match["score"])
+            reasoning = match["reason"].strip()
+            level = match["level"]
+            if level is None:
+                level_match = _LEVEL_RE.search(text)
+                level = level_match.group(1) if level_match else None
+        else:
+            # Fields missing or out of order: search each one separately
+            score_match = _SCORE_RE.search(text)
+            risk_score = float(score_match.group(1)) if score_match else 0.5
+            
+            reasoning_match = _REASONING_RE.search(text)
+            reasoning = reasoning_match.group(1).strip() if reasoning_match else "Risk assessment completed."
+            
+            level_match = _LEVEL_RE.search(text)
+            level = level_match.group(1) if level_match else None
         
         # Ensure risk score is between 0 and 1
         risk_score = max(0.0, min(1.0, risk_score))
         
-        # Extract reasoning
-        reasoning_match = re.search(r'REASONING:\s*(.+?)(?=RISK_LEVEL:|$)', text, re.IGNORECASE | re.DOTALL)
-        reasoning = reasoning_match.group(1).strip() if reasoning_match else "Risk assessment completed."
-        
-        # Extract risk level
-        level_match = re.search(r'RISK_LEVEL:\s*(LOW|MEDIUM|HIGH)', text, re.IGNORECASE)
-        risk_level = level_match.group(1).upper() if level_match else self._calculate_risk_level(risk_score)
+        risk_level = level.upper() if level else self._calculate_risk_level(risk_score)
         
         return risk_score, reasoning, risk_level
     
     def _calculate_risk_level(self, risk_score: float) -> str:
         """Calculate risk level from score"""
-        if risk_score >= 0.7:
-            return "HIGH"
-        elif risk_score >= 0.4:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        return PromptBuilder.RISK_LEVELS[bisect_right(PromptBuilder.RISK_LEVEL_THRESHOLDS, risk_score)]
 
     def _parse_explanation(self, text: str) -> tuple[str, str]:
         """
@@ -757,20 +1813,11 @@ CONFIDENCE: 0.85"""
         Returns:
             (rationale, recommended_action) tuple
         """
-        import re
-        
-        # Try to split by common delimiters (case-insensitive)
-        # Handle numbered list format: "3. Recommended action:"
-        patterns = [
-            r'(?:^\d+\.\s*)?Recommended action:\s*',
-            r'(?:^\d+\.\s*)?Recommendation:\s*',
-        ]
-        
         rationale = text.strip()
         action = "Review this transaction for potential risk factors."
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        for pattern in _ACTION_RES:
+            match = pattern.search(text)
             if match:
                 # Split at the match
                 rationale = text[:match.start()].strip()
@@ -778,7 +1825,7 @@ CONFIDENCE: 0.85"""
                 break
         
         # Clean up any trailing numbered items in rationale
-        rationale = re.sub(r'\n\d+\.\s*$', '', rationale).strip()
+        rationale = _TRAILING_NUM_RE.sub('', rationale).strip()
         
         return rationale, action
 
@@ -796,13 +1843,9 @@ CONFIDENCE: 0.85"""
         # Base confidence on risk score extremeness
         # High/low risk scores = higher confidence
         # Medium risk scores = lower confidence
-        
-        if risk_score >= 0.8 or risk_score <= 0.2:
-            base_confidence = 0.9
-        elif risk_score >= 0.6 or risk_score <= 0.4:
-            base_confidence = 0.75
-        else:
-            base_confidence = 0.6
+        # (bisect_left puts low boundaries in the lower band, bisect_right high ones in the upper)
+        find_band = bisect_right if risk_score > 0.5 else bisect_left
+        base_confidence = self.CONFIDENCE_LEVELS[find_band(self.CONFIDENCE_THRESHOLDS, risk_score)]
 
         # Adjust based on explanation length (longer = more confident)
         if len(explanation) > 200:
@@ -814,10 +1857,20 @@ CONFIDENCE: 0.85"""
         return max(0.5, min(0.95, base_confidence))
 
     def get_token_usage(self) -> Dict[str, Any]:
-        """Get current token usage statistics"""
+        """
+        Get current token usage statistics
+
+        Reads the in-memory totals without waiting for the tracking thread (safe to call
+        from async handlers), so requests still queued for tracking are not yet counted.
+        """
         return self.token_tracker.get_usage_summary()
 
     def check_budget_status(self) -> tuple[bool, str]:
-        """Check if budget warning is needed"""
+        """Check if budget warning is needed (same in-memory totals as get_token_usage)"""
         return self.token_tracker.check_budget_warning()
 
+
+@lru_cache(maxsize=1)
+def get_watsonx_service() -> WatsonXService:
+    """Get the shared watsonx.ai service (model, caches and pools are reused)."""
+    return WatsonXService()